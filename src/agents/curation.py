@@ -1,262 +1,562 @@
-import json
-from typing import List, Dict, Any, Optional
+import asyncio
+import hashlib
+import numpy as np
+import orjson # C-accelerated JSON for parsing LLM responses and serializing article payloads
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import lru_cache
+from typing import List, Dict, Any, Optional, Set, Tuple
 from datetime import datetime
 import re # re for regex 
 import unicodedata # for specific Curation Agent string normalization
 
 from src.config import get_settings
 # Import all necessary functions/variables from src.utils
-from src.utils import logger, clean_json_string, load_state_from_json, save_state_to_json, DATA_DIR 
-from src.tools.llm_interface import get_default_llm
-from src.models.research_models import SummarizedContent
-from src.models.newsletter_models import NewsletterOutline, NewsletterArticle, NewsletterSection
-from src.prompts.curation_prompts import NEWSLETTER_CATEGORIES, CURATION_SCORING_PROMPT, CURATION_OUTLINE_PROMPT
+from src.utils import logger, load_state_from_json, save_state_to_json, DATA_DIR 
+from src.tools.llm_interface import get_default_llm, get_default_embeddings, invoke_json, invoke_structured, ainvoke_structured, save_response_cache
+from src.tools.content_cache import ContentCache
+from src.tools.embedding_scorer import EmbeddingScorer
+from src.models.research_models import SummarizedContent, ArticleScore, ArticleScoreBatch
+from src.models.newsletter_models import NewsletterOutline, NewsletterArticle, NewsletterSection, OutlinePoints
+from src.prompts.curation_prompts import NEWSLETTER_CATEGORIES, NEWSLETTER_CATEGORY_DESCRIPTIONS, CURATION_RELEVANCE_ANCHORS, CURATION_SCORING_PROMPT, CURATION_SCORING_BATCH_PROMPT, CURATION_OUTLINE_PROMPT, CURATION_OUTLINE_POINTS_PROMPT
 from src.state import AgentState
 
 # Load application settings
 settings = get_settings()
 
-# Initialize the LLM for this agent
-curation_llm = get_default_llm()
-
-# --- Helper for escaping quotes in string values (for retry logic) ---
-def escape_quotes_in_json_string_values(json_string: str) -> str:
-    """
-    Attempts to escape unescaped double quotes inside string values of a JSON string.
-    This is a targeted fix for LLM output issues like 'They"re'.
-    It is designed to be applied *after* initial cleaning and *before* a retry of json.loads().
-    """
-    def replace_callback(match):
-        # match.group(1) is the content inside the JSON string value (excluding outer quotes)
-        content = match.group(1)
-        # Replace unescaped double quotes with escaped ones
-        # Use a temporary placeholder to avoid double-escaping if LLM already put `\"`
-        content = content.replace(r'\"', '[TEMP_ESCAPED_QUOTE]') # Temporarily unescape valid escapes
-        content = content.replace('"', r'\"')                      # Escape the remaining (invalid) double quotes
-        content = content.replace('[TEMP_ESCAPED_QUOTE]', r'\"') # Restore valid escapes
-        return f'"{content}"'
-    
-    # This regex finds all quoted strings (keys AND values).
-    # We apply the escaping logic within the callback.
-    # It must be very careful not to mess with JSON structure.
-    # We assume keys are typically well-formed after clean_json_string.
-        
-    # For a simple case like `{"summary": "It's a "test"."}`, the `"` before test breaks it.
-    # We need to target only the string *values* effectively.
-    
-    # A safer, but more complex approach is to use a lexer or parse more carefully.
-    # For now, let's target string values specifically.
-    
-    # This pattern attempts to match JSON string values.
-    # It looks for `": "` followed by content, then a `"` before a comma or brace.
-    # This is still not 100% foolproof for all JSON structures, but addresses common LLM issues.
-    # The most robust way is manual iteration or a proper JSON repair library.
-
-    # Given the constraint of direct modification, let's simplify to a more direct `replace`
-    # for known LLM bad characters *within* string values, if clean_json_string didn't handle it.
-    # This is still highly experimental for arbitrary JSON.
-    
-    # Re-introducing a simpler, more targeted inner string replacement
-    # This attempts to fix "word"word" in a value to "word\"word"
-    # It assumes quotes within JSON string *values* are the problem.
-    # Find patterns like "WORD"WORD" where first WORD is quoted, but second is not.
-    # This is often where LLMs fail.
-    
-    # Let's try a very direct substitution for known problematic patterns in the LLM's raw output.
-    # This is less a "JSON parser" and more a "LLM output corrector".
-    corrected_str = json_string
-    # Example: "They"re" -> "They\'re" or "They\"re"
-    corrected_str = corrected_str.replace('"s ', r'\"s ') # e.g., "AI's" -> "AI\"s"
-    corrected_str = corrected_str.replace('"t ', r'\"t ') # e.g., "don't" -> "don\"t"
-    corrected_str = corrected_str.replace('"re ', r'\"re ') # e.g., "They're" -> "They\"re"
-    corrected_str = corrected_str.replace('"ve ', r'\"ve ') # e.g., "I've" -> "I\"ve"
-    corrected_str = corrected_str.replace('"ll ', r'\"ll ') # e.g., "we'll" -> "we\"ll"
-    corrected_str = corrected_str.replace('"m ', r'\"m ') # e.g., "I'm" -> "I\"m"
-    corrected_str = corrected_str.replace('"d ', r'\"d ') # e.g., "I'd" -> "I\"d"
-    corrected_str = corrected_str.replace('" "', r'\" \"') # common for "word" "word"
-    corrected_str = corrected_str.replace('." ', '.\" ') # fix for end-of-sentence quote issues
-
-    # Final pass to ensure general unescaped quotes within any string are escaped.
-    # This is applied *after* the initial parsing attempt, and only if JSON fails.
-    # It finds ANY quoted string, and replaces internal unescaped quotes.
-    # This is the most complex one and may double escape.
-    # Given the previous issues, it's safer to have clean_json_string be minimal.
-    # For now, the `clean_json_string` to have handled `\"` via its 3.3.
-    # The problem is typically about an unexpected `"` that ends a string prematurely.
-    
-    # A safer approach for these is manual replacements for known LLM failure patterns
-    # (like the above `s`, `t`, etc.) or to instruct the LLM even more strongly.
-    
-    # Let's try the previous robust regex here if LLM fails, as a retry mechanism.
-    # This should find `"` *not* preceded by `\` and replace with `\"`.
-    # This is applied *within string values* assuming the string itself is bounded by `"`
-    # This regex is still tricky but might be needed.
-    
-    # Final, *specific* attempt for "brain" type problem:
-    # Look for a pattern like `word"word` that occurs *inside* a string.
-    # This is too hard for a general regex to do reliably across arbitrary JSON.
-    # The best bet is a few targeted `replace()` for common LLM `"` insertions, then retry.
-    
-    # If the LLM generates `"controller or "brain" to control"`, the `clean_json_string`
-    # regex `r'"((?:[^"\\]|\\.)*)"'` will only pick up `"controller or "` as the first string.
-    # The rest `brain" to control"` is then malformed.
-    # This is why the error is "Expecting ',' delimiter".
+# O(1) membership checks when validating LLM-assigned categories (the list keeps its order for prompts)
+_CATEGORIES_SET = frozenset(NEWSLETTER_CATEGORIES)
+
+# Shared empty default for missing/null list fields in parsed LLM output
+_EMPTY: Tuple = ()
+
+# Initialize the LLM for this agent (JSON mode: every curation prompt expects a JSON object back)
+curation_llm = get_default_llm(json_mode=True)
+
+# Persistent cache of relevance scores/categories keyed by article content (exact + optional semantic tier)
+scoring_cache = ContentCache("curation_scores", semantic_threshold=settings.SCORING_SEMANTIC_CACHE_THRESHOLD) if settings.SCORING_CACHE_ENABLED else None
+use_embedding_scoring = settings.CURATION_SCORING_MODE.lower() == "embedding"
+use_semantic_cache = settings.SCORING_CACHE_ENABLED and settings.SCORING_SEMANTIC_CACHE_ENABLED
+scoring_embeddings = get_default_embeddings() if use_embedding_scoring or use_semantic_cache else None
 
-    # Let's revert to a very simple inner-quote fixer that just replaces all single quotes,
-    # and then manually replace the most common contractions that LLMs fail to escape.
+# LLM-free scorer (category centroids + relevance anchors); the LLM scoring path remains the fallback
+embedding_scorer = EmbeddingScorer(
+    scoring_embeddings,
+    NEWSLETTER_CATEGORY_DESCRIPTIONS,
+    CURATION_RELEVANCE_ANCHORS,
+    relevance_floor=settings.CURATION_EMBEDDING_RELEVANCE_FLOOR,
+    relevance_ceiling=settings.CURATION_EMBEDDING_RELEVANCE_CEILING
+) if use_embedding_scoring else None
+
+
+@lru_cache(maxsize=4096)
+def _title_key(title: str) -> str:
+    """
+    Canonical lookup key for an article title: NFC-normalized and casefolded, so visually identical titles
+    (composed vs. decomposed accents, 'ß' vs. 'SS') match. Memoized, so each distinct title is normalized once;
+    titles that already pass the NFC quick-check (ASCII and most real titles) skip the normalizer.
+    """
+    if not unicodedata.is_normalized('NFC', title):
+        title = unicodedata.normalize('NFC', title)
+    return title.casefold()
+
+
+def _apply_score(article: SummarizedContent, score: ArticleScore) -> None:
+    """
+    Validates a structured LLM scoring result and assigns relevance_score/category to the article.
+    Out-of-range scores fall back to 0.0 and unknown categories to 'Miscellaneous'.
+    """
+    relevance_score = score.relevance_score
+    category = score.category.strip(',')
     
-    return corrected_str
+    if not (0.0 <= relevance_score <= 1.0):
+        logger.warning(f"CURATION AGENT: Invalid relevance score '{relevance_score}' for '{article.title}'. Setting to 0.0.")
+        relevance_score = 0.0
+    if category not in _CATEGORIES_SET:
+        logger.warning(f"CURATION AGENT: Invalid category '{category}' for '{article.title}'. Setting to 'Miscellaneous'.")
+        category = 'Miscellaneous'
 
+    article.relevance_score = relevance_score
+    article.category = category
+    logger.debug("CURATION AGENT: Scored '%s' with %.2f, Category: %s.", article.title, relevance_score, category)
 
-def curation_agent_node(state: AgentState) -> AgentState:
-    logger.info("---CURATION AGENT: Starting content curation and structuring---")
 
-    summarized_content: List[SummarizedContent] = state.get('summarized_content', [])
-    if not summarized_content:
-        logger.warning("CURATION AGENT: No summarized content found in state. Skipping curation.")
-        new_state = state.copy()
-        new_state['newsletter_outline'] = NewsletterOutline(
-            introduction_points=["No significant news found this week. Please check back next time!"],
-            sections=[],
-            conclusion_points=["Stay tuned for more updates."],
-            overall_trends=["Low news volume"]
-        )
-        return new_state
+def _scoring_prompt(article: SummarizedContent):
+    return CURATION_SCORING_PROMPT.format(
+        title=article.title,
+        summary=article.summary,
+        key_entities=", ".join(article.key_entities),
+        trends_identified=", ".join(article.trends_identified)
+    )
 
-    scored_and_categorized_articles: List[SummarizedContent] = []
 
-    # Create a map from original summarized content URLs for accurate URL propagation
-    summarized_content_url_map = {item.title.lower(): item.original_url for item in summarized_content}
+def _batch_scoring_prompt(batch: List[SummarizedContent]):
+    articles_json = orjson.dumps([
+        {
+            "id": idx,
+            "title": a.title,
+            "summary": a.summary,
+            "key_entities": a.key_entities,
+            "trends_identified": a.trends_identified
+        }
+        for idx, a in enumerate(batch)
+    ]).decode() # Compact, non-ASCII kept as-is: fewer prompt tokens than an indented dump
+    return CURATION_SCORING_BATCH_PROMPT.format(
+        articles_json=articles_json
+    )
 
 
-    # --- Step 1: Score Relevance and Assign Category for Each Article ---
-    logger.info(f"CURATION AGENT: Scoring and categorizing {len(summarized_content)} articles.")
-    for i, article in enumerate(summarized_content):
-        logger.info(f"CURATION AGENT: Scoring article {i+1}/{len(summarized_content)}: {article.title}")
-        try:
-            prompt = CURATION_SCORING_PROMPT.format(
-                title=article.title,
-                summary=article.summary,
-                key_entities=", ".join(article.key_entities),
-                trends_identified=", ".join(article.trends_identified),
-                categories=", ".join(NEWSLETTER_CATEGORIES)
-            )
-            response_content = curation_llm.invoke(prompt)
-
-            parsed_llm_output = {}
-            try_count = 0
-            max_tries = 3
-
-            while try_count < max_tries:
-                try:
-                    # Use the robust clean_json_string from utils
-                    cleaned_json_str = clean_json_string(response_content)
-                    
-                    # Ensure it's a valid JSON object before parsing (assert for debugging)
-                    assert cleaned_json_str.startswith('{') and cleaned_json_str.endswith('}'), \
-                        f"Cleaned JSON string does not start/end with braces: {cleaned_json_str[:100]}..."
-
-                    parsed_llm_output = json.loads(cleaned_json_str)
-                    break
-                except json.JSONDecodeError as e:
-                    logger.warning(f"CURATION AGENT: JSONDecodeError for scoring '{article.title}' on try {try_count+1}: {e}. Raw response (cleaned, first 500 chars): '{cleaned_json_str[:500]}...'")
-                    # If parsing fails, try to escape inner quotes and retry
-                    if try_count < max_tries - 1: # Only try escape if there's a subsequent retry
-                        response_content = escape_quotes_in_json_string_values(response_content)
-                        logger.warning(f"CURATION AGENT: Attempting inner quote escape for '{article.title}'.")
-                    try_count += 1
-                    if try_count == max_tries:
-                        logger.error(f"CURATION AGENT: Max retries reached for JSON parsing for scoring '{article.title}'. Setting score to 0.0.")
-                        raise # Re-raise after max tries to trigger the outer except
-                except ValueError as e: # Catch ValueError from clean_json_string if no braces found
-                    logger.error(f"CURATION AGENT: Parsing failed for '{article.title}' due to structural error after cleaning: {e}. Raw response: '{response_content[:500]}...'")
-                    raise # Re-raise to trigger the outer except for default handling
-
-            relevance_score = float(parsed_llm_output.get('relevance_score', 0.0))
-            category = parsed_llm_output.get('category', 'Miscellaneous').strip(',')
-            
-            if not (0.0 <= relevance_score <= 1.0):
-                logger.warning(f"CURATION AGENT: Invalid relevance score '{relevance_score}' for '{article.title}'. Setting to 0.0.")
-                relevance_score = 0.0
-            if category not in NEWSLETTER_CATEGORIES:
-                logger.warning(f"CURATION AGENT: Invalid category '{category}' for '{article.title}'. Setting to 'Miscellaneous'.")
-                category = 'Miscellaneous'
-
-            article.relevance_score = relevance_score
-            article.category = category
-            scored_and_categorized_articles.append(article)
-            logger.info(f"CURATION AGENT: Scored '{article.title}' with {relevance_score:.2f}, Category: {category}.")
+def _set_fallback_score(article: SummarizedContent) -> None:
+    article.relevance_score = 0.0
+    article.category = 'Miscellaneous'
+
+
+def _apply_batch_scores(batch: List[SummarizedContent], batch_output: Optional[ArticleScoreBatch]) -> List[SummarizedContent]:
+    """
+    Assigns batch scores back to their articles by id and returns the articles the LLM omitted,
+    which the caller re-scores individually. A failed batch (None) returns the whole batch.
+    """
+    scores_by_id: Dict[int, ArticleScore] = {item.id: item for item in batch_output.scores} if batch_output else {}
+    unscored_articles: List[SummarizedContent] = []
+    for idx, article in enumerate(batch):
+        item = scores_by_id.get(idx)
+        if item is None:
+            unscored_articles.append(article)
+        else:
+            _apply_score(article, item)
+    if unscored_articles:
+        logger.warning(f"CURATION AGENT: {len(unscored_articles)} article(s) missing from batch response. Scoring individually.")
+    return unscored_articles
 
+
+def _make_batches(articles: List[SummarizedContent]) -> List[List[SummarizedContent]]:
+    """
+    Groups articles into as few scoring batches as possible, one LLM call per batch. A batch is closed when it
+    reaches settings.CURATION_BATCH_SIZE articles or its serialized articles would exceed
+    settings.CURATION_BATCH_MAX_PROMPT_CHARS (a character proxy for the model's context budget).
+    """
+    batch_size = max(1, settings.CURATION_BATCH_SIZE)
+    if batch_size == 1:
+        return [[a] for a in articles]
+
+    batches: List[List[SummarizedContent]] = []
+    current: List[SummarizedContent] = []
+    current_chars = 0
+    for article in articles:
+        # Approximate size of the article's entry in articles_json (fields plus JSON/indentation overhead)
+        article_chars = len(article.title) + len(article.summary) + sum(map(len, article.key_entities)) + sum(map(len, article.trends_identified)) + 120
+        if current and (len(current) >= batch_size or current_chars + article_chars > settings.CURATION_BATCH_MAX_PROMPT_CHARS):
+            batches.append(current)
+            current, current_chars = [], 0
+        current.append(article)
+        current_chars += article_chars
+    if current:
+        batches.append(current)
+    return batches
+
+
+async def _score_article(article: SummarizedContent, semaphore: asyncio.Semaphore) -> SummarizedContent:
+    """
+    Scores a single article for relevance and assigns it a newsletter category using the LLM.
+    The semaphore bounds the number of in-flight LLM requests to respect provider rate limits.
+    On any error the article falls back to a 0.0 score and the 'Miscellaneous' category.
+    """
+    async with semaphore:
+        try:
+            scored = await ainvoke_structured(curation_llm, _scoring_prompt(article), ArticleScore)
+            _apply_score(article, scored)
         except Exception as e:
             logger.error(f"CURATION AGENT: Error during LLM invocation or parsing for scoring '{article.title}': {e}", exc_info=True)
-            article.relevance_score = 0.0
-            article.category = 'Miscellaneous'
-            scored_and_categorized_articles.append(article)
+            _set_fallback_score(article)
 
-    # --- Step 2: Select Top Articles and Prepare for Outline Generation ---
-    selected_articles_for_newsletter = [
-        a for a in scored_and_categorized_articles if a.relevance_score is not None and a.relevance_score >= settings.EDITORIAL_MIN_QUALITY_SCORE
-    ]
-    selected_articles_for_newsletter.sort(key=lambda x: (x.relevance_score if x.relevance_score is not None else 0.0), reverse=True)
+    return article
 
-    if not selected_articles_for_newsletter:
-        logger.warning("CURATION AGENT: No articles met the minimum relevance threshold. Newsletter will be empty.")
-        new_state = state.copy()
-        new_state['newsletter_outline'] = NewsletterOutline(
-            introduction_points=["No significant news found this week. Please check back next time!"],
-            sections=[],
-            conclusion_points=["Stay tuned for more updates."],
-            overall_trends=["Low news volume"]
+
+async def _score_batch(batch: List[SummarizedContent], semaphore: asyncio.Semaphore) -> List[SummarizedContent]:
+    """
+    Scores a batch of articles with a single LLM call (CURATION_SCORING_BATCH_PROMPT).
+    Articles the LLM omits or scores unparseably are re-scored individually via _score_article.
+    """
+    batch_output: Optional[ArticleScoreBatch] = None
+    async with semaphore:
+        try:
+            batch_output = await ainvoke_structured(curation_llm, _batch_scoring_prompt(batch), ArticleScoreBatch)
+        except Exception as e:
+            logger.error(f"CURATION AGENT: Error during batch scoring of {len(batch)} articles: {e}", exc_info=True)
+
+    unscored_articles = _apply_batch_scores(batch, batch_output)
+    if unscored_articles:
+        await asyncio.gather(*[_score_article(a, semaphore) for a in unscored_articles])
+
+    return batch
+
+
+async def _score_articles(articles: List[SummarizedContent]) -> List[SummarizedContent]:
+    """
+    Scores all articles concurrently with asyncio.gather, bounded by settings.LLM_MAX_CONCURRENCY.
+    Results are returned in the same order as the input list.
+    """
+    semaphore = asyncio.Semaphore(settings.LLM_MAX_CONCURRENCY)
+    batches = _make_batches(articles)
+    if settings.CURATION_BATCH_SIZE <= 1:
+        tasks = [_score_article(batch[0], semaphore) for batch in batches]
+    else:
+        tasks = [_score_batch(batch, semaphore) for batch in batches]
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+
+    scored_articles: List[SummarizedContent] = []
+    for batch, result in zip(batches, results):
+        if isinstance(result, BaseException):
+            # Scoring coroutines handle their own errors; this only catches failures outside their try blocks.
+            logger.error(f"CURATION AGENT: Scoring task failed for {len(batch)} article(s): {result}")
+            for article in batch:
+                _set_fallback_score(article)
+        scored_articles.extend(batch)
+    return scored_articles
+
+
+def _score_article_sync(article: SummarizedContent) -> SummarizedContent:
+    """
+    Blocking variant of _score_article for the thread-pool executor.
+    """
+    try:
+        _apply_score(article, invoke_structured(curation_llm, _scoring_prompt(article), ArticleScore))
+    except Exception as e:
+        logger.error(f"CURATION AGENT: Error during LLM invocation or parsing for scoring '{article.title}': {e}", exc_info=True)
+        _set_fallback_score(article)
+    return article
+
+
+def _score_batch_sync(batch: List[SummarizedContent]) -> List[SummarizedContent]:
+    """
+    Blocking variant of _score_batch for the thread-pool executor.
+    """
+    batch_output: Optional[ArticleScoreBatch] = None
+    try:
+        batch_output = invoke_structured(curation_llm, _batch_scoring_prompt(batch), ArticleScoreBatch)
+    except Exception as e:
+        logger.error(f"CURATION AGENT: Error during batch scoring of {len(batch)} articles: {e}", exc_info=True)
+    for article in _apply_batch_scores(batch, batch_output):
+        _score_article_sync(article)
+    return batch
+
+
+def _score_articles_threaded(articles: List[SummarizedContent]) -> List[SummarizedContent]:
+    """
+    Scores all articles on a ThreadPoolExecutor of settings.LLM_MAX_CONCURRENCY workers using the
+    sync LLM client. LLM calls are network-bound and release the GIL while waiting, so this gives
+    the same concurrency as _score_articles without requiring an event loop.
+    """
+    batches = _make_batches(articles)
+    with ThreadPoolExecutor(max_workers=max(1, settings.LLM_MAX_CONCURRENCY)) as pool:
+        if settings.CURATION_BATCH_SIZE <= 1:
+            futures = {pool.submit(_score_article_sync, batch[0]): batch for batch in batches}
+        else:
+            futures = {pool.submit(_score_batch_sync, batch): batch for batch in batches}
+        for future in as_completed(futures):
+            try:
+                future.result()
+            except Exception as e:
+                batch = futures[future]
+                logger.error(f"CURATION AGENT: Scoring task failed for {len(batch)} article(s): {e}")
+                for article in batch:
+                    _set_fallback_score(article)
+    return articles
+
+
+def _run_llm_scoring(articles: List[SummarizedContent]) -> List[SummarizedContent]:
+    """
+    Runs LLM scoring with asyncio by default. Uses the thread pool when CURATION_SCORING_EXECUTOR is
+    "threads", or when an event loop is already running in this thread (asyncio.run cannot be nested).
+    """
+    use_threads = settings.CURATION_SCORING_EXECUTOR.lower() == "threads"
+    if not use_threads:
+        try:
+            asyncio.get_running_loop()
+            logger.info("CURATION AGENT: Event loop already running; scoring on a thread pool instead.")
+            use_threads = True
+        except RuntimeError:
+            pass
+    if use_threads:
+        return _score_articles_threaded(articles)
+    return asyncio.run(_score_articles(articles))
+
+
+def _deduplicate_articles(articles: List[SummarizedContent]) -> List[SummarizedContent]:
+    """
+    Drops repeated articles (same URL, or same summary content from another source/URL), keeping the
+    first occurrence, so duplicates from overlapping feeds are never scored or published twice.
+    """
+    seen_urls: Set[str] = set()
+    seen_hashes: Set[bytes] = set()
+    unique_articles: List[SummarizedContent] = []
+    for article in articles:
+        url = article.original_url.strip()
+        content_hash = hashlib.blake2s(article.summary.strip().encode('utf-8'), digest_size=8).digest()
+        if (url and url in seen_urls) or content_hash in seen_hashes:
+            logger.debug("CURATION AGENT: Skipping duplicate article '%s' (%s).", article.title, url)
+            continue
+        if url:
+            seen_urls.add(url)
+        seen_hashes.add(content_hash)
+        unique_articles.append(article)
+    return unique_articles
+
+
+def _embedding_text(article: SummarizedContent) -> str:
+    return f"{article.title}\n{article.summary}"
+
+
+def _score_articles_by_embedding(articles: List[SummarizedContent], vectors: Optional[List[List[float]]] = None) -> List[SummarizedContent]:
+    """
+    Scores and categorizes articles with the EmbeddingScorer: one batched embedding call plus two
+    matrix products, no LLM calls. Precomputed vectors (e.g., from the semantic cache lookup) are reused.
+    """
+    if vectors is None:
+        vectors = scoring_embeddings.embed_documents([_embedding_text(a) for a in articles])
+    for article, (relevance_score, category) in zip(articles, embedding_scorer.score(vectors)):
+        article.relevance_score = relevance_score
+        article.category = category
+        logger.debug("CURATION AGENT: Scored '%s' with %.2f, Category: %s (embedding).", article.title, relevance_score, category)
+    return articles
+
+
+def _normalized_content_key(article: SummarizedContent) -> Tuple[str, str]:
+    return (" ".join(article.title.lower().split()), article.summary[:512])
+
+
+def _score_with_configured_mode(articles: List[SummarizedContent], vectors: Optional[List[List[float]]] = None) -> List[SummarizedContent]:
+    """
+    Scores articles with the configured CURATION_SCORING_MODE, falling back to LLM scoring if embedding scoring fails.
+    """
+    if embedding_scorer is not None:
+        try:
+            return _score_articles_by_embedding(articles, vectors)
+        except Exception as e:
+            logger.error(f"CURATION AGENT: Embedding scoring failed: {e}. Falling back to LLM scoring.", exc_info=True)
+    return _run_llm_scoring(articles)
+
+
+def _group_semantic_repeats(indices: List[int], vectors: List[List[float]]) -> List[Tuple[int, int]]:
+    """
+    Greedily clusters the given articles by embedding similarity (>= SCORING_SEMANTIC_CACHE_THRESHOLD).
+    Returns (article index, index of the cluster's first article) for every non-first member.
+    """
+    matrix = np.asarray([vectors[i] for i in indices], dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0.0] = 1.0
+    matrix /= norms
+    similarities = matrix @ matrix.T
+    assigned = np.zeros(len(indices), dtype=bool)
+    repeats: List[Tuple[int, int]] = []
+    for row in range(len(indices)):
+        if assigned[row]:
+            continue
+        members = np.flatnonzero(~assigned[row + 1:] & (similarities[row, row + 1:] >= settings.SCORING_SEMANTIC_CACHE_THRESHOLD)) + row + 1
+        assigned[members] = True
+        repeats.extend((indices[m], indices[row]) for m in members)
+    return repeats
+
+
+def _score_uncached(articles: List[SummarizedContent], vectors: Optional[List[List[float]]] = None) -> List[SummarizedContent]:
+    """
+    Scores articles that missed the cache. Near-identical articles within this run (same normalized
+    title and summary head, e.g., a republished press release) are scored once and share the result.
+    With the semantic cache enabled, paraphrases of the same story (embedding similarity above the
+    semantic threshold) are grouped the same way.
+    """
+    first_index_by_key: Dict[Tuple[str, str], int] = {}
+    unique_indices: List[int] = []
+    repeats: List[Tuple[int, int]] = [] # (article index, index of the article it repeats)
+    for idx, article in enumerate(articles):
+        key = _normalized_content_key(article)
+        if key in first_index_by_key:
+            repeats.append((idx, first_index_by_key[key]))
+        else:
+            first_index_by_key[key] = idx
+            unique_indices.append(idx)
+
+    if vectors is not None and use_semantic_cache and len(unique_indices) > 1:
+        semantic_repeats = _group_semantic_repeats(unique_indices, vectors)
+        if semantic_repeats:
+            repeated = {idx for idx, _ in semantic_repeats}
+            unique_indices = [i for i in unique_indices if i not in repeated]
+            repeats.extend(semantic_repeats)
+
+    if not repeats:
+        return _score_with_configured_mode(articles, vectors)
+
+    logger.info(f"CURATION AGENT: {len(repeats)} near-identical article(s) will reuse another article's score.")
+    _score_with_configured_mode(
+        [articles[i] for i in unique_indices],
+        [vectors[i] for i in unique_indices] if vectors is not None else None
+    )
+    source_by_index = dict(repeats)
+    for idx, source_idx in source_by_index.items():
+        # An exact repeat may point at an article that is itself a semantic repeat; follow to the scored one.
+        while source_idx in source_by_index:
+            source_idx = source_by_index[source_idx]
+        articles[idx].relevance_score = articles[source_idx].relevance_score
+        articles[idx].category = articles[source_idx].category
+    return articles
+
+
+def _score_articles_with_cache(articles: List[SummarizedContent]) -> List[SummarizedContent]:
+    """
+    Scores articles, skipping the LLM for any article found in the scoring cache.
+    Lookups try the exact tier (url + title + summary) first, then, if enabled, the semantic tier
+    (embedding similarity of title + summary). Newly scored articles are written back to the cache.
+    """
+    if scoring_cache is None:
+        return _score_uncached(articles)
+
+    keys = [ContentCache.make_key(a.original_url, a.title, a.summary) for a in articles]
+    vectors: Dict[int, List[float]] = {}
+    miss_indices: List[int] = []
+    exact_hits = semantic_hits = 0
+
+    for idx, (article, key) in enumerate(zip(articles, keys)):
+        cached = scoring_cache.get(key)
+        if cached is not None:
+            article.relevance_score = cached['relevance_score']
+            article.category = cached['category']
+            exact_hits += 1
+        else:
+            miss_indices.append(idx)
+
+    if miss_indices and use_semantic_cache:
+        try:
+            embedded = scoring_embeddings.embed_documents([_embedding_text(articles[i]) for i in miss_indices])
+            vectors = dict(zip(miss_indices, embedded))
+        except Exception as e:
+            logger.warning(f"CURATION AGENT: Failed to embed articles for semantic cache lookup: {e}")
+        remaining_indices = []
+        for idx in miss_indices:
+            cached = scoring_cache.get_similar(vectors[idx]) if idx in vectors else None
+            if cached is not None:
+                articles[idx].relevance_score = cached['relevance_score']
+                articles[idx].category = cached['category']
+                semantic_hits += 1
+            else:
+                remaining_indices.append(idx)
+        miss_indices = remaining_indices
+
+    logger.info(f"CURATION AGENT: Scoring cache hits: {exact_hits} exact, {semantic_hits} semantic; {len(miss_indices)} article(s) need LLM scoring.")
+    if not miss_indices:
+        return articles
+
+    miss_vectors = [vectors[i] for i in miss_indices] if all(i in vectors for i in miss_indices) else None
+    _score_uncached([articles[i] for i in miss_indices], miss_vectors)
+
+    for idx in miss_indices:
+        article = articles[idx]
+        # 0.0/'Miscellaneous' is also the failure fallback, so it is never cached to allow a retry next run.
+        if article.relevance_score == 0.0 and article.category == 'Miscellaneous':
+            continue
+        scoring_cache.set(
+            keys[idx],
+            {"relevance_score": article.relevance_score, "category": article.category},
+            vectors.get(idx)
         )
-        return new_state
+    scoring_cache.save()
+    return articles
+
+
+def _generate_outline_points(selected_articles_for_newsletter: List[SummarizedContent]) -> OutlinePoints:
+    """
+    Asks the LLM for the introduction/conclusion/trend points only, from a compact '[Category] Title' digest
+    of the selected articles rather than their full JSON. Falls back to generic points on any error.
+    """
+    articles_digest = "\n".join(f"[{a.category or 'Miscellaneous'}] {a.title}" for a in selected_articles_for_newsletter)
+    try:
+        points_prompt = CURATION_OUTLINE_POINTS_PROMPT.format(articles_digest=articles_digest)
+        return invoke_structured(curation_llm, points_prompt, OutlinePoints)
+    except Exception as e:
+        logger.error(f"CURATION AGENT: Error generating outline points: {e}. Using generic points.", exc_info=True)
+        return OutlinePoints(
+            introduction_points=["This week's digest highlights advancements in AI agent development and related fields."],
+            conclusion_points=["Stay updated for more breakthroughs."],
+            overall_trends=sorted({t for a in selected_articles_for_newsletter for t in a.trends_identified})[:3]
+        )
+
+
+def _deterministic_outline_points(selected_articles_for_newsletter: List[SummarizedContent]) -> OutlinePoints:
+    """
+    Outline points derived directly from the selected articles, without an LLM: the introduction names
+    the top articles and the trends are the most frequent trends identified across them.
+    """
+    top_titles = ", ".join(a.title for a in selected_articles_for_newsletter[:3])
+    trend_counts = Counter(t for a in selected_articles_for_newsletter for t in a.trends_identified)
+    return OutlinePoints.model_construct(
+        introduction_points=[f"This week's digest highlights: {top_titles}."],
+        conclusion_points=["Stay updated for more breakthroughs."],
+        overall_trends=[t for t, _ in trend_counts.most_common(3)]
+    )
+
+
+def _build_outline(selected_articles_for_newsletter: List[SummarizedContent], llm_points: bool = True) -> NewsletterOutline:
+    """
+    Builds the newsletter outline deterministically: articles (already sorted by relevance) are grouped
+    into sections by the category assigned during scoring, so no LLM round-trip over the full article
+    corpus is needed. Only the introduction/conclusion/trend points are generated by the LLM, and not
+    even those when llm_points is False.
+    All inputs are already-validated models, so the outline is assembled with model_construct (no re-validation).
+    """
+    buckets: Dict[str, List[NewsletterArticle]] = defaultdict(list)
+    for a in selected_articles_for_newsletter:
+        category = a.category if a.category in _CATEGORIES_SET else 'Miscellaneous'
+        buckets[category].append(
+            NewsletterArticle.model_construct(
+                title=a.title,
+                summary=a.summary,
+                url=a.original_url,
+                category=category
+            )
+        )
+    sections = [NewsletterSection.model_construct(name=category, articles=articles) for category, articles in buckets.items()]
+
+    outline_points = _generate_outline_points(selected_articles_for_newsletter) if llm_points else _deterministic_outline_points(selected_articles_for_newsletter)
+    newsletter_outline = NewsletterOutline.model_construct(sections=sections, **outline_points.model_dump())
+    logger.info(f"CURATION AGENT: Built newsletter outline with {len(sections)} section(s).")
+    return newsletter_outline
 
-    logger.info(f"CURATION AGENT: Selected {len(selected_articles_for_newsletter)} articles for the newsletter.")
 
+def _parse_outline_date(value: Any) -> datetime:
+    """
+    Parses the LLM-provided outline date (ISO 8601); anything unparseable (e.g., the prompt's
+    'YYYY-MM-DD...' placeholder echoed back) falls back to now.
+    """
+    if isinstance(value, datetime):
+        return value
+    try:
+        return datetime.fromisoformat(str(value))
+    except ValueError:
+        return datetime.now()
+
+
+def _generate_outline_via_llm(selected_articles_for_newsletter: List[SummarizedContent], summarized_content_url_map: Dict[str, str]) -> NewsletterOutline:
+    """
+    Generates the complete newsletter outline (sections included) with the LLM via CURATION_OUTLINE_PROMPT.
+    Used when settings.CURATION_OUTLINE_VIA_LLM is enabled.
+    """
     # Prepare articles for outline generation prompt
-    articles_for_outline_json_str = json.dumps([
+    articles_for_outline_json_str = orjson.dumps([
         {
             "title": sa.title,
             "summary": sa.summary,
-            "url": summarized_content_url_map.get(sa.title.lower(), sa.original_url), # Use URL from map if title matches, else fallback to original
+            "url": summarized_content_url_map.get(_title_key(sa.title), sa.original_url), # Use URL from map if title matches, else fallback to original
             "category": sa.category
         }
         for sa in selected_articles_for_newsletter
-    ], indent=2)
+    ]).decode() # Compact, non-ASCII kept as-is: fewer prompt tokens than an indented dump
 
-    # --- Step 3: Generate Newsletter Outline using LLM ---
-    logger.info("CURATION AGENT: Generating newsletter outline.")
+    logger.info("CURATION AGENT: Generating newsletter outline with the LLM.")
     try:
         outline_prompt = CURATION_OUTLINE_PROMPT.format(
-            summarized_articles_json=articles_for_outline_json_str,
-            categories=", ".join(NEWSLETTER_CATEGORIES) # Pass categories for prompt
+            summarized_articles_json=articles_for_outline_json_str
         )
-        response_content = curation_llm.invoke(outline_prompt) # Use outline_prompt here
-        logger.debug(f"Raw LLM response for outline: {response_content[:1000]}...") # Log raw response
-
-        parsed_outline_output = {}
-        try_count = 0
-        max_tries = 3
-
-        while try_count < max_tries:
-            try:
-                cleaned_json_str = clean_json_string(response_content) # Use the robust cleaning function
-                
-                # Ensure it's a valid JSON object before parsing (assert for debugging)
-                assert cleaned_json_str.startswith('{') and cleaned_json_str.endswith('}'), \
-                    f"Cleaned JSON string does not start/end with braces for outline: {cleaned_json_str[:100]}..."
-
-                parsed_outline_output = json.loads(cleaned_json_str)
-                break
-            except json.JSONDecodeError as e:
-                logger.warning(f"CURATION AGENT: JSONDecodeError for outline generation on try {try_count+1}: {e}. Raw response (cleaned, first 500 chars): '{cleaned_json_str[:500]}...'")
-                # If parsing fails, try to escape inner quotes and retry
-                if try_count < max_tries - 1: # Only try escape if there's a subsequent retry
-                    response_content = escape_quotes_in_json_string_values(response_content)
-                    logger.warning(f"CURATION AGENT: Attempting inner quote escape for outline generation.")
-                try_count += 1
-                if try_count == max_tries:
-                    logger.error(f"CURATION AGENT: Max retries reached for JSON parsing for outline. Falling back to generic outline.")
-                    raise
+        # Work on a new dict: the fields below are rewritten (sections become model objects)
+        parsed_outline_output = dict(invoke_json(curation_llm, outline_prompt))
 
         # --- Post-parsing validation and correction for the outline structure ---
         # Ensure 'date' field is present and correct
@@ -264,15 +564,15 @@ def curation_agent_node(state: AgentState) -> AgentState:
             parsed_outline_output['date'] = datetime.now().isoformat()
         
         # Ensure top-level lists are present, even if empty, or are correct types
-        parsed_outline_output['introduction_points'] = [str(p) for p in parsed_outline_output.get('introduction_points', []) if p is not None]
-        parsed_outline_output['conclusion_points'] = [str(p) for p in parsed_outline_output.get('conclusion_points', []) if p is not None]
-        parsed_outline_output['overall_trends'] = [str(t) for t in parsed_outline_output.get('overall_trends', []) if t is not None]
+        # (`or _EMPTY` also covers an explicit null from the LLM without allocating a fresh list per field)
+        for field in ('introduction_points', 'conclusion_points', 'overall_trends'):
+            parsed_outline_output[field] = [str(p) for p in parsed_outline_output.get(field) or _EMPTY if p is not None]
 
         # Process sections defensively
-        sections_data = parsed_outline_output.get('sections', [])
+        sections_data = parsed_outline_output.get('sections') or _EMPTY
         cleaned_sections = []
-        # Track articles already added to avoid duplicates if LLM puts them in multiple sections
-        articles_added_to_outline = set() 
+        # Track articles already added to avoid duplicates if LLM puts them in multiple sections (hashes of title keys)
+        articles_added_to_outline: Set[int] = set()
 
         for section_data in sections_data: # Loop through each section
             if not isinstance(section_data, dict):
@@ -282,31 +582,33 @@ def curation_agent_node(state: AgentState) -> AgentState:
             section_name = section_data.get('name', 'Miscellaneous')
             # Ensure category validation strips any trailing commas from LLM output
             section_name = section_name.strip(',')
-            if section_name not in NEWSLETTER_CATEGORIES:
+            if section_name not in _CATEGORIES_SET:
                 logger.warning(f"CURATION AGENT: LLM suggested invalid section name '{section_name}'. Defaulting to 'Miscellaneous'.")
                 section_name = 'Miscellaneous'
 
-            articles_data_in_section = section_data.get('articles', []) 
+            articles_data_in_section = section_data.get('articles') or _EMPTY
             cleaned_articles = []
             for article_data in articles_data_in_section:
-                # Deduplicate by title to avoid issues like "A Survey..." appearing multiple times
-                article_id = article_data.get('title', '').lower()
-                if article_id in articles_added_to_outline:
-                    logger.info(f"CURATION AGENT: Skipping duplicate article '{article_data.get('title')}' in outline generation.")
-                    continue
-                articles_added_to_outline.add(article_id)
-
                 if not isinstance(article_data, dict):
                     logger.warning(f"CURATION AGENT: Invalid article format in section '{section_name}': {article_data}. Skipping.")
                     continue
 
                 # Ensure required article fields are present and valid
                 title = article_data.get('title', 'No Title Provided').strip()
+                title_key = _title_key(title) # Normalized once; reused for the dedup check and both URL lookups
+
+                # Deduplicate by title to avoid issues like "A Survey..." appearing multiple times
+                title_hash = hash(title_key)
+                if title_hash in articles_added_to_outline:
+                    logger.debug("CURATION AGENT: Skipping duplicate article '%s' in outline generation.", title)
+                    continue
+                articles_added_to_outline.add(title_hash)
+
                 summary = article_data.get('summary', 'No summary provided.').strip()
                 # Prioritize URL from summarized_content_url_map if title matches, else fallback to LLM-provided URL or fallback.
-                url = summarized_content_url_map.get(title.lower(), article_data.get('url', '#').strip())
+                url = summarized_content_url_map.get(title_key, article_data.get('url', '#').strip())
                 if not url or url == '#': # If LLM still provides # or an empty URL, try map again
-                    url = summarized_content_url_map.get(title.lower(), '#').strip() # Fallback to original map or '#'
+                    url = summarized_content_url_map.get(title_key, '#').strip() # Fallback to original map or '#'
                 
                 # Ensure category strips trailing comma from LLM output
                 category = article_data.get('category', section_name).strip(',')
@@ -317,11 +619,12 @@ def curation_agent_node(state: AgentState) -> AgentState:
                     summary = "No summary provided."
                 if not url: # Final fallback check for URL
                     url = "#" 
-                if category not in NEWSLETTER_CATEGORIES:
+                if category not in _CATEGORIES_SET:
                     category = section_name # Ensure category is valid
 
+                # Every field was defaulted/validated above, so skip Pydantic re-validation
                 cleaned_articles.append(
-                    NewsletterArticle(
+                    NewsletterArticle.model_construct(
                         title=title,
                         summary=summary,
                         url=url,
@@ -330,7 +633,7 @@ def curation_agent_node(state: AgentState) -> AgentState:
                 )
             if cleaned_articles:
                 cleaned_sections.append(
-                    NewsletterSection(
+                    NewsletterSection.model_construct(
                         name=section_name,
                         articles=cleaned_articles
                     )
@@ -344,21 +647,20 @@ def curation_agent_node(state: AgentState) -> AgentState:
             logger.warning("CURATION AGENT: LLM generated an empty 'sections' list despite relevant articles. Forcing basic outline structure.")
             # This creates a structured outline that the Generation Agent can process.
             # We still ensure URLs are correct.
-            forced_articles_for_outline = []
-            for a in selected_articles_for_newsletter:
-                forced_articles_for_outline.append(
-                    NewsletterArticle(
-                        title=a.title,
-                        summary=a.summary,
-                        url=summarized_content_url_map.get(a.title.lower(), a.original_url),
-                        category=a.category # Use the category assigned by scoring
-                    )
+            forced_articles_for_outline = [
+                NewsletterArticle.model_construct(
+                    title=a.title,
+                    summary=a.summary,
+                    url=summarized_content_url_map.get(_title_key(a.title), a.original_url),
+                    category=a.category # Use the category assigned by scoring
                 )
+                for a in selected_articles_for_newsletter
+            ]
 
-            newsletter_outline = NewsletterOutline(
+            newsletter_outline = NewsletterOutline.model_construct(
                 introduction_points=["This week's digest highlights advancements in AI agent development and related fields."],
                 sections=[
-                    NewsletterSection(
+                    NewsletterSection.model_construct(
                         name="Featured Articles", # Generic section name
                         articles=forced_articles_for_outline
                     )
@@ -367,7 +669,13 @@ def curation_agent_node(state: AgentState) -> AgentState:
                 overall_trends=["AI agent advancements", "Ethical AI"]
             )
         else:
-            newsletter_outline = NewsletterOutline(**parsed_outline_output)
+            newsletter_outline = NewsletterOutline.model_construct(
+                date=_parse_outline_date(parsed_outline_output['date']),
+                introduction_points=parsed_outline_output['introduction_points'],
+                sections=parsed_outline_output['sections'],
+                conclusion_points=parsed_outline_output['conclusion_points'],
+                overall_trends=parsed_outline_output['overall_trends']
+            )
 
         logger.info("CURATION AGENT: Successfully generated newsletter outline.")
 
@@ -375,13 +683,13 @@ def curation_agent_node(state: AgentState) -> AgentState:
         logger.error(f"CURATION AGENT: Error during LLM invocation or outline processing after JSON parsing: {e}", exc_info=True)
         # This fallback is for when parsing works, but Pydantic validation fails, or another logical error occurs.
         # It will use the new formatting for fallback articles.
-        newsletter_outline = NewsletterOutline(
+        newsletter_outline = NewsletterOutline.model_construct(
             introduction_points=["An error occurred while generating the outline. Here's a raw list of articles."],
             sections=[
-                NewsletterSection(
+                NewsletterSection.model_construct(
                     name="Raw Articles (Fallback)",
                     articles=[
-                        NewsletterArticle(
+                        NewsletterArticle.model_construct(
                             title=a.title,
                             summary=f"Summary: {a.summary}\nRead more: {a.original_url}", # <--- THIS IS THE FALLBACK FORMATTING
                             url=a.original_url,
@@ -394,11 +702,148 @@ def curation_agent_node(state: AgentState) -> AgentState:
             overall_trends=["Error in outline generation", "Review required"]
         )
 
+    return newsletter_outline
+
+
+def _log_scoring_summary(articles: List[SummarizedContent]) -> None:
+    """
+    Emits one summary line for the whole scoring step (per-article scores are logged at DEBUG level only).
+    """
+    if not articles:
+        return
+    category_counts = Counter(a.category for a in articles)
+    mean_score = sum(a.relevance_score or 0.0 for a in articles) / len(articles)
+    logger.info(
+        "CURATION AGENT: Scored %d articles (mean relevance %.2f). Categories: %s.",
+        len(articles), mean_score, ", ".join(f"{c}={n}" for c, n in category_counts.most_common())
+    )
+
+
+# Above this many articles, relevance filtering/sorting is vectorized with numpy
+VECTORIZED_SELECTION_MIN_ARTICLES = 256
+
+
+def _select_articles(articles: List[SummarizedContent], min_score: float) -> List[SummarizedContent]:
+    """
+    Returns the articles scoring at least min_score, sorted by relevance (highest first, ties in input order).
+    Large inputs use one vectorized mask + stable argsort instead of per-article comparisons and a Python sort key.
+    """
+    if len(articles) <= VECTORIZED_SELECTION_MIN_ARTICLES:
+        selected = [a for a in articles if a.relevance_score is not None and a.relevance_score >= min_score]
+        selected.sort(key=lambda x: x.relevance_score, reverse=True)
+        return selected
+
+    scores = np.fromiter(
+        (a.relevance_score if a.relevance_score is not None else -np.inf for a in articles),
+        dtype=np.float64, count=len(articles)
+    )
+    selected_indices = np.flatnonzero(scores >= min_score)
+    order = selected_indices[np.argsort(-scores[selected_indices], kind='stable')]
+    return [articles[i] for i in order]
+
+
+def _empty_outline() -> NewsletterOutline:
+    return NewsletterOutline.model_construct(
+        introduction_points=["No significant news found this week. Please check back next time!"],
+        sections=[],
+        conclusion_points=["Stay tuned for more updates."],
+        overall_trends=["Low news volume"]
+    )
+
+
+def _unique_summarized_content(state: AgentState) -> List[SummarizedContent]:
+    """
+    Returns the state's summarized content with duplicate articles dropped (empty if there is none).
+    """
+    summarized_content: List[SummarizedContent] = state.get('summarized_content', [])
+    if not summarized_content:
+        logger.warning("CURATION AGENT: No summarized content found in state. Skipping curation.")
+        return []
+
+    # Drop duplicate articles before any scoring work is spent on them
+    unique_content = _deduplicate_articles(summarized_content)
+    if len(unique_content) < len(summarized_content):
+        logger.info(f"CURATION AGENT: Removed {len(summarized_content) - len(unique_content)} duplicate article(s).")
+    return unique_content
+
+
+def _build_url_map(summarized_content: List[SummarizedContent]) -> Dict[str, str]:
+    # Create a map from original summarized content URLs for accurate URL propagation
+    return {_title_key(item.title): item.original_url for item in summarized_content}
+
+
+def _log_scoring_start(summarized_content: List[SummarizedContent]) -> None:
+    # --- Step 1: Score Relevance and Assign Category for Each Article ---
+    # Scoring calls are independent and network-bound, so they are dispatched concurrently.
+    logger.info(f"CURATION AGENT: Scoring and categorizing {len(summarized_content)} articles (max {settings.LLM_MAX_CONCURRENCY} concurrent LLM calls, batch size {settings.CURATION_BATCH_SIZE}).")
+
+
+def _finish_curation(scored_and_categorized_articles: List[SummarizedContent], summarized_content_url_map: Dict[str, str]) -> Dict[str, Any]:
+    """
+    Selects the top scored articles and builds the newsletter outline (steps 2 and 3 of curation).
+    """
+    _log_scoring_summary(scored_and_categorized_articles)
+
+    # --- Step 2: Select Top Articles and Prepare for Outline Generation ---
+    selected_articles_for_newsletter = _select_articles(scored_and_categorized_articles, settings.EDITORIAL_MIN_QUALITY_SCORE)
+
+    if not selected_articles_for_newsletter:
+        logger.warning("CURATION AGENT: No articles met the minimum relevance threshold. Newsletter will be empty.")
+        save_response_cache()
+        return {'newsletter_outline': _empty_outline()}
+
+    logger.info(f"CURATION AGENT: Selected {len(selected_articles_for_newsletter)} articles for the newsletter.")
+
+    # --- Step 3: Build the Newsletter Outline ---
+    if len(selected_articles_for_newsletter) <= settings.CURATION_OUTLINE_LLM_THRESHOLD:
+        # Too few articles to be worth an LLM round-trip: sections and points are built directly.
+        logger.info(f"CURATION AGENT: Only {len(selected_articles_for_newsletter)} article(s) selected; building the outline without the LLM.")
+        newsletter_outline = _build_outline(selected_articles_for_newsletter, llm_points=False)
+    elif settings.CURATION_OUTLINE_VIA_LLM:
+        newsletter_outline = _generate_outline_via_llm(selected_articles_for_newsletter, summarized_content_url_map)
+    else:
+        newsletter_outline = _build_outline(selected_articles_for_newsletter)
+
+    save_response_cache()
     logger.info("---CURATION AGENT: Completed content curation and structuring---")
 
-    new_state = state.copy()
-    new_state['newsletter_outline'] = newsletter_outline
-    return new_state
+    # Return only the updated channel; LangGraph merges it into the shared state.
+    return {'newsletter_outline': newsletter_outline}
+
+
+def curation_agent_node(state: AgentState) -> Dict[str, Any]:
+    logger.info("---CURATION AGENT: Starting content curation and structuring---")
+
+    summarized_content = _unique_summarized_content(state)
+    if not summarized_content:
+        return {'newsletter_outline': _empty_outline()}
+
+    summarized_content_url_map = _build_url_map(summarized_content)
+
+    _log_scoring_start(summarized_content)
+    scored_and_categorized_articles: List[SummarizedContent] = _score_articles_with_cache(summarized_content)
+    return _finish_curation(scored_and_categorized_articles, summarized_content_url_map)
+
+
+async def curation_agent_node_async(state: AgentState) -> Dict[str, Any]:
+    """
+    Async variant of curation_agent_node, used when the graph runs with ainvoke/astream.
+    Scoring runs in a worker thread (where _run_llm_scoring starts its own event loop for concurrent
+    LLM calls) so the graph's loop is never blocked, and the title -> URL map is built while scoring
+    is in flight. Only selection and outline generation wait for the scores.
+    """
+    logger.info("---CURATION AGENT: Starting content curation and structuring---")
+
+    summarized_content = _unique_summarized_content(state)
+    if not summarized_content:
+        return {'newsletter_outline': _empty_outline()}
+
+    _log_scoring_start(summarized_content)
+    scored_and_categorized_articles, summarized_content_url_map = await asyncio.gather(
+        asyncio.to_thread(_score_articles_with_cache, summarized_content),
+        asyncio.to_thread(_build_url_map, summarized_content)
+    )
+    return await asyncio.to_thread(_finish_curation, scored_and_categorized_articles, summarized_content_url_map)
 
 # Example usage (for testing purposes) - This block is standalone testing.
 if __name__ == "__main__":
@@ -1,172 +1,260 @@
+import asyncio
 import os
 import re
-from typing import Optional, List
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional, List, Dict, Any, Set, Tuple
 from datetime import datetime
-import markdown
-import premailer
-
-from sendgrid import SendGridAPIClient
-from sendgrid.helpers.mail import Mail, Email
+from markdown_it import MarkdownIt # Fast CommonMark renderer for the fallback path
+import css_inline # Rust-backed CSS inliner (replaces premailer)
+from selectolax.lexbor import LexborHTMLParser
 
 from src.config import get_settings
 # Import DATA_DIR along with other utilities
 from src.utils import logger, load_state_from_json, save_state_to_json, DATA_DIR 
 from src.models.newsletter_models import Newsletter
+from src.tools.sendgrid_client import get_sendgrid_client
 from src.state import AgentState 
 
 settings = get_settings()
 
-# Instantiate SendGridClient globally for efficiency.
-class SendGridClientWrapper:
+# Characters stripped from the subject when building archive filenames
+_SAFE_SUBJECT_RE = re.compile(r'[^\w\s-]')
+
+# Presence of a <style> block; without one there is nothing to inline
+_STYLE_TAG_RE = re.compile(r'<style\b', re.IGNORECASE)
+
+# Contents of each <style> block (the template's stylesheet)
+_STYLE_BLOCK_RE = re.compile(r'<style\b[^>]*>(.*?)</style>', re.IGNORECASE | re.DOTALL)
+
+
+# End of the document head, where the non-inlinable rules are put back after inlining
+_HEAD_END_RE = re.compile(r'</head\s*>', re.IGNORECASE)
+_CSS_COMMENT_RE = re.compile(r'/\*.*?\*/', re.DOTALL)
+
+
+def _non_inlinable_rules(css_text: str) -> str:
     """
-    A client to send emails using SendGrid.
+    Returns the top-level rules of a stylesheet that cannot be inlined into style="" attributes: block at-rules
+    (e.g., the template's @media query) and rules whose selectors use pseudo-classes or pseudo-elements (e.g., a:hover).
+    These must stay in a <style> block for mail clients that support them.
     """
-    def __init__(self):
-        if not settings.SENDGRID_API_KEY:
-            logger.error("SENDGRID_API_KEY not found in environment variables. Email sending will not function.")
-            raise ValueError("SENDGRID_API_KEY is required for SendGridClientWrapper.")
-        self.sg = SendGridAPIClient(settings.SENDGRID_API_KEY)
-        self.sender_email = settings.NEWSLETTER_SENDER_EMAIL
-        logger.info(f"SendGridClientWrapper initialized with sender email: {self.sender_email}")
-
-    def send_email(self, recipients: List[str], subject: str, content_html: str) -> bool:
-        """
-        Sends an email to the specified recipients.
-        Args:
-            recipients (List[str]): List of recipient email addresses.
-            subject (str): The subject of the email.
-            content_html (str): The HTML content of the email body.
-        Returns:
-            bool: True if email was sent successfully, False otherwise.
-        """
-        if not recipients:
-            logger.warning("No recipients provided for email. Skipping send.")
-            return False
+    css_text = _CSS_COMMENT_RE.sub('', css_text) # An '@' or brace inside a comment must not affect the scan
+    rules: List[str] = []
+    depth = 0
+    start = 0
+    for idx, char in enumerate(css_text):
+        if char == '{':
+            depth += 1
+        elif char == '}':
+            depth -= 1
+            if depth == 0:
+                rule = css_text[start:idx + 1].strip()
+                prelude = rule.partition('{')[0]
+                if prelude.startswith('@') or ':' in prelude:
+                    rules.append(rule)
+                start = idx + 1
+        elif char == ';' and depth == 0:
+            start = idx + 1 # Statement at-rule (@import, @charset): nothing to keep
+    return "\n".join(rules)
+
+
+def _keep_rules(html: str, rules: str) -> str:
+    """
+    Puts the non-inlinable rules back into the inlined document as a <style> block at the end of <head>.
+    """
+    if not rules:
+        return html
+    style_block = f"<style>\n{rules}\n</style>\n"
+    html, replaced = _HEAD_END_RE.subn(lambda m: style_block + m.group(), html, count=1)
+    return html if replaced else style_block + html
 
-        logger.info(f"Attempting to send email to {len(recipients)} recipients with subject: '{subject}'")
 
-        message = Mail(
-            from_email=self.sender_email,
-            to_emails=recipients,
-            subject=subject,
-            html_content=content_html
-        )
-        try:
-            response = self.sg.send(message)
-            if response.status_code in [200, 202]:
-                logger.info(f"Email sent successfully! Status Code: {response.status_code}")
-                return True
-            else:
-                logger.error(f"Failed to send email. Status Code: {response.status_code}, Body: {response.body}, Headers: {response.headers}")
-                return False
-        except Exception as e:
-            logger.error(f"Error sending email via SendGrid: {e}", exc_info=True)
-            return False
+@lru_cache(maxsize=8)
+def _compile_css(css_text: str) -> Tuple[css_inline.CSSInliner, str]:
+    """
+    Returns an inliner bound to the given stylesheet plus the stylesheet's non-inlinable rules, cached by
+    CSS text: a recurring template gets the same inliner and the same split on every delivery. The <style> tags
+    themselves are not re-read (their CSS arrives as extra_css) and are dropped from the output, so the caller
+    puts those rules back in a <style> block; remote stylesheets are never fetched.
+    """
+    inliner = css_inline.CSSInliner(inline_style_tags=False, keep_style_tags=False, load_remote_stylesheets=False, extra_css=css_text)
+    return inliner, _non_inlinable_rules(css_text)
 
-sendgrid_client_instance = SendGridClientWrapper()
 
+# Markdown -> HTML renderer for the (rare) fallback when the draft has no usable HTML
+_MD = MarkdownIt()
 
-def delivery_agent_node(state: AgentState) -> AgentState:
+# Directories already created by this process (skips the makedirs stat on later deliveries)
+_ensured_dirs: Set[Path] = set()
+
+
+def _ensure_dir(path: Path):
+    if path not in _ensured_dirs:
+        os.makedirs(path, exist_ok=True)
+        _ensured_dirs.add(path)
+
+
+def _html_to_text(html: str) -> str:
+    """
+    Parses the final HTML once (lexbor) and returns its visible body text, one block per line.
+    """
+    tree = LexborHTMLParser(html)
+    for node in tree.css('style, script'):
+        node.decompose()
+    body = tree.body
+    return body.text(separator='\n', strip=True) if body is not None else ""
+
+
+def _write_markdown_archive(path: Path, newsletter_draft: Newsletter):
+    # Header and body are assembled into one string so the file is encoded and written in a single call
+    sent_timestamp = newsletter_draft.sent_timestamp.strftime('%Y-%m-%d %H:%M:%S') if newsletter_draft.sent_timestamp else 'N/A'
+    payload = (
+        f"Subject: {newsletter_draft.subject}\n\n"
+        f"Date: {newsletter_draft.date.strftime('%Y-%m-%d %H:%M:%S')}\n\n"
+        f"Approval Score: {newsletter_draft.approval_score:.2f}\n"
+        f"Feedback: {newsletter_draft.feedback}\n"
+        f"Revision Attempts: {newsletter_draft.revision_attempts}\n"
+        f"Sent Timestamp: {sent_timestamp}\n\n"
+        "---\n\n"
+        f"{newsletter_draft.content_markdown}"
+    )
+    _ensure_dir(path.parent)
+    path.write_text(payload, encoding='utf-8')
+
+
+def _write_html_archive(path: Path, content_html: str):
+    # Encoded once up front and written in binary mode, bypassing the text-mode codec/newline layer
+    _ensure_dir(path.parent)
+    path.write_bytes(content_html.encode('utf-8'))
+
+
+async def _send_newsletter(recipients: List[str], subject: str, content_html: str, content_text: Optional[str]) -> bool:
+    try:
+        client = get_sendgrid_client()
+    except ValueError as e: # Client could not be created (e.g., SENDGRID_API_KEY missing)
+        logger.error(f"DELIVERY AGENT: SendGrid client unavailable: {e}")
+        return False
+    try:
+        return await client.send_email_async(recipients, subject, content_html, content_text)
+    finally:
+        await client.aclose() # The connection pool is bound to the current event loop
+
+
+async def delivery_agent_node_async(state: AgentState) -> Dict[str, Any]:
     """
     Delivery Agent node: Handles the final delivery of the newsletter and archives it.
     - Checks if the newsletter draft is approved.
-    - Inlines CSS for email compatibility using premailer.
-    - Sends the email using SendGrid.
-    - Archives the Markdown and HTML versions of the sent/attempted newsletter.
-    - Updates 'newsletter_sent' and 'delivery_report' in the state.
+    - Inlines CSS for email compatibility using css-inline.
+    - Sends the email using SendGrid, writing the HTML archive while the request is in flight.
+    - Archives the Markdown version (which records the send outcome) once the send completes.
+    - Returns only the updated keys ('newsletter_sent', 'delivery_report' and, once sent/attempted,
+      'newsletter_draft'); LangGraph merges them into the shared state.
     """
     logger.info("---DELIVERY AGENT: Starting newsletter delivery process---")
 
     newsletter_draft: Optional[Newsletter] = state.get('newsletter_draft')
 
-    new_state = state.copy()
-    new_state['newsletter_sent'] = False
-    new_state['delivery_report'] = "No action taken."
-
     if not newsletter_draft or not newsletter_draft.is_approved:
         logger.warning("DELIVERY AGENT: Newsletter not approved or not found. Skipping delivery.")
-        new_state['delivery_report'] = "Newsletter not approved or draft missing. Delivery skipped."
-        return new_state
+        return {'newsletter_sent': False, 'delivery_report': "Newsletter not approved or draft missing. Delivery skipped."}
 
     # --- CSS Inlining (HTML is already templated in Generation Agent) ---
     final_html_to_send = ""
     try:
-        if newsletter_draft.content_html:
-            # Apply Premailer for CSS Inlining. The content_html already includes the full template.
-            final_html_to_send = premailer.transform(newsletter_draft.content_html)
-            logger.info("DELIVERY AGENT: CSS inlined successfully using Premailer.")
+        if newsletter_draft.content_html and not _STYLE_TAG_RE.search(newsletter_draft.content_html):
+            # Styles are already inline (no <style> block), so re-parsing the document would not change it.
+            final_html_to_send = newsletter_draft.content_html
+            logger.info("DELIVERY AGENT: HTML has no <style> block; skipping CSS inlining.")
+        elif (len(newsletter_draft.content_html) > settings.DELIVERY_MAX_INLINE_HTML_CHARS
+              or len(_STYLE_TAG_RE.findall(newsletter_draft.content_html)) > settings.DELIVERY_MAX_STYLE_BLOCKS):
+            # Circuit breaker: pathological input (huge document or many style blocks) is sent as templated.
+            final_html_to_send = newsletter_draft.content_html
+            logger.warning(f"DELIVERY AGENT: HTML too large or too many <style> blocks ({len(newsletter_draft.content_html)} chars); skipping CSS inlining.")
+        elif newsletter_draft.content_html:
+            # Inline the template's CSS. The content_html already includes the full template.
+            css_text = "\n".join(_STYLE_BLOCK_RE.findall(newsletter_draft.content_html))
+            inliner, kept_rules = _compile_css(css_text)
+            # The <style> tags are dropped by the inliner; @media queries (mobile layout) and :hover rules are restored here
+            final_html_to_send = _keep_rules(inliner.inline(newsletter_draft.content_html), kept_rules)
+            logger.info("DELIVERY AGENT: CSS inlined successfully using css-inline.")
         else:
             logger.warning("DELIVERY AGENT: No HTML content found in draft. Using markdown content as fallback HTML.")
             # This fallback should ideally not be hit if Generation Agent works correctly
-            final_html_to_send = markdown.markdown(newsletter_draft.content_markdown) # Fallback
+            final_html_to_send = _MD.render(newsletter_draft.content_markdown) # Fallback
 
     except Exception as e:
-        logger.error(f"DELIVERY AGENT: Error preparing HTML for delivery (Premailer): {e}", exc_info=True)
-        final_html_to_send = markdown.markdown(newsletter_draft.content_markdown) # Fallback to raw markdown HTML
+        logger.error(f"DELIVERY AGENT: Error preparing HTML for delivery (CSS inlining): {e}", exc_info=True)
+        final_html_to_send = _MD.render(newsletter_draft.content_markdown) # Fallback to raw markdown HTML
 
 
+    # Plain-text rendering of the final HTML, kept on the draft alongside content_html
+    try:
+        newsletter_draft.content_text = _html_to_text(final_html_to_send)
+    except Exception as e:
+        logger.warning(f"DELIVERY AGENT: Could not derive plain text from HTML: {e}")
+        newsletter_draft.content_text = newsletter_draft.content_markdown
+
     # --- Send Email ---
     recipients: List[str] = state.get('recipients', settings.get_newsletter_recipients_list())
     if not recipients:
         logger.error("DELIVERY AGENT: No recipients found in state or settings. Cannot send email.")
-        new_state['delivery_report'] = "No recipients configured. Delivery skipped."
-        return new_state
+        return {'newsletter_sent': False, 'delivery_report': "No recipients configured. Delivery skipped."}
 
     subject = newsletter_draft.subject
     content_to_send = final_html_to_send # Use the fully processed HTML
+    newsletter_draft.content_html = final_html_to_send # Archived (and kept on the draft) whether or not the send succeeds
+
+    # Archive filenames share one timestamp: the start of this delivery
+    stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    safe_subject = _SAFE_SUBJECT_RE.sub('', subject).strip().replace(' ', '_')
+    # Use DATA_DIR imported from utils
+    archives_dir = DATA_DIR / 'archives'
+    archive_path_md = archives_dir / f"{stamp}_{safe_subject[:50]}.md"
+    archive_path_html = archives_dir / f"{stamp}_{safe_subject[:50]}.html"
 
+    # The HTML archive does not depend on the send result, so it is written while the SendGrid request is in flight
     logger.info(f"DELIVERY AGENT: Attempting to send newsletter to {len(recipients)} recipients.")
-    email_sent_successfully = sendgrid_client_instance.send_email(recipients, subject, content_to_send)
+    send_result, html_archive_result = await asyncio.gather(
+        _send_newsletter(recipients, subject, content_to_send, newsletter_draft.content_text),
+        asyncio.to_thread(_write_html_archive, archive_path_html, content_to_send),
+        return_exceptions=True
+    )
+    if isinstance(send_result, Exception):
+        logger.error(f"DELIVERY AGENT: Unexpected error while sending: {send_result}", exc_info=send_result)
+    email_sent_successfully = send_result is True
 
     if email_sent_successfully:
         logger.info("DELIVERY AGENT: Email delivery initiated successfully via SendGrid.")
-        new_state['newsletter_sent'] = True
-        new_state['delivery_report'] = "Newsletter sent successfully via SendGrid."
-        newsletter_draft.sent_timestamp = datetime.now()
-        # Update content_html on the draft object with the final inlined HTML for archiving
-        newsletter_draft.content_html = final_html_to_send
+        delivery_report = "Newsletter sent successfully via SendGrid."
+        newsletter_draft.sent_timestamp = datetime.now() # Actual send completion time
     else:
         logger.error("DELIVERY AGENT: Failed to send email via SendGrid. Check logs for details.")
-        new_state['delivery_report'] = "Email delivery failed. Check SendGrid logs and API key."
+        delivery_report = "Email delivery failed. Check SendGrid logs and API key."
         newsletter_draft.sent_timestamp = None
-        newsletter_draft.content_html = final_html_to_send # Still save it for debugging even if send failed
-
 
     # --- Archive Newsletter ---
-    try:
-        # Use DATA_DIR imported from utils
-        archives_dir = DATA_DIR / 'archives' 
-        os.makedirs(archives_dir, exist_ok=True)
-
-        safe_subject = re.sub(r'[^\w\s-]', '', subject).strip().replace(' ', '_')
-        archive_filename_md = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{safe_subject[:50]}.md"
-        archive_filename_html = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{safe_subject[:50]}.html"
-
-        # Archive Markdown version
-        archive_path_md = archives_dir / archive_filename_md
-        with open(archive_path_md, 'w', encoding='utf-8') as f:
-            f.write(f"Subject: {newsletter_draft.subject}\n\n")
-            f.write(f"Date: {newsletter_draft.date.strftime('%Y-%m-%d %H:%M:%S')}\n\n")
-            f.write(f"Approval Score: {newsletter_draft.approval_score:.2f}\n")
-            f.write(f"Feedback: {newsletter_draft.feedback}\n")
-            f.write(f"Revision Attempts: {newsletter_draft.revision_attempts}\n")
-            f.write(f"Sent Timestamp: {newsletter_draft.sent_timestamp.strftime('%Y-%m-%d %H:%M:%S') if newsletter_draft.sent_timestamp else 'N/A'}\n\n")
-            f.write("---\n\n")
-            f.write(newsletter_draft.content_markdown)
-        logger.info(f"DELIVERY AGENT: Markdown newsletter archived to: {archive_path_md}")
-
-        # Archive HTML version
-        archive_path_html = archives_dir / archive_filename_html
-        with open(archive_path_html, 'w', encoding='utf-8') as f:
-            f.write(newsletter_draft.content_html if newsletter_draft.content_html else "")
+    archive_error: Optional[BaseException] = html_archive_result if isinstance(html_archive_result, BaseException) else None
+    if archive_error is None:
         logger.info(f"DELIVERY AGENT: HTML newsletter archived to: {archive_path_html}")
-
-    except Exception as e:
-        logger.error(f"DELIVERY AGENT: Error archiving newsletter: {e}", exc_info=True)
-        new_state['delivery_report'] += " Archiving failed."
+        try:
+            await asyncio.to_thread(_write_markdown_archive, archive_path_md, newsletter_draft)
+            logger.info(f"DELIVERY AGENT: Markdown newsletter archived to: {archive_path_md}")
+        except Exception as e:
+            archive_error = e
+    if archive_error is not None:
+        logger.error(f"DELIVERY AGENT: Error archiving newsletter: {archive_error}", exc_info=archive_error)
+        delivery_report += " Archiving failed."
 
     logger.info("---DELIVERY AGENT: Completed newsletter delivery process---")
-    return new_state
+    return {'newsletter_sent': email_sent_successfully, 'delivery_report': delivery_report, 'newsletter_draft': newsletter_draft}
+
+
+def delivery_agent_node(state: AgentState) -> Dict[str, Any]:
+    """
+    Synchronous entry point (used by app.stream()): runs delivery_agent_node_async on its own event loop.
+    """
+    return asyncio.run(delivery_agent_node_async(state))
 
 # Example usage (for testing purposes)
 if __name__ == "__main__":
@@ -266,7 +354,7 @@ if __name__ == "__main__":
     }
 
     # Run the delivery agent node
-    updated_state = delivery_agent_node(initial_state)
+    updated_state = {**initial_state, **delivery_agent_node(initial_state)}
     draft_final = updated_state['newsletter_draft']
 
     print(f"\n--- Delivery Agent Results ---")
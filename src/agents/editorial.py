@@ -1,29 +1,167 @@
-import json
 import re
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Set
 from datetime import datetime
+from json_repair import repair_json # Tolerant single-pass JSON repair for LLM output
+from pydantic import TypeAdapter
 
 from src.config import get_settings
 from src.utils import logger, clean_json_string, load_state_from_json, save_state_to_json, DATA_DIR, escape_quotes_in_json_string_values 
 from src.tools.llm_interface import get_default_llm # Our LLM interface
-from src.models.newsletter_models import Newsletter 
-from src.models.research_models import SummarizedContent # To pass original summarized content for factual check
+from src.models.newsletter_models import Newsletter, EditorialReview, EditorialIssue
+from src.models.research_models import SummarizedContent, FALLBACK_SUMMARY_PREFIX # Original summarized content for factual check; placeholder summary of a failed extraction
 from src.prompts.editorial_prompts import EDITORIAL_REVIEW_PROMPT
 from src.state import AgentState # Our shared state definition
 
 # Load application settings
 settings = get_settings()
 
-# Initialize the LLM for this agent
-editorial_llm = get_default_llm()
+# Initialize the LLM for this agent (JSON mode: the review must come back as a JSON object)
+editorial_llm = get_default_llm(json_mode=True)
 
-def editorial_agent_node(state: AgentState) -> AgentState:
+# Approval thresholds, resolved once at import rather than on every review
+_MIN_SCORE = settings.EDITORIAL_MIN_QUALITY_SCORE
+_MAX_REV = settings.EDITORIAL_MAX_REVISION_ATTEMPTS
+
+# Structural checks for the deterministic pre-review
+_DETERMINISTIC_PRECHECK = settings.EDITORIAL_DETERMINISTIC_PRECHECK
+_HEADING_RE = re.compile(r'^(#{2,3})\s+(.*?)\s*$')
+_READ_MORE_RE = re.compile(r'\[Read More\]\(([^)\s]*)\)')
+_REQUIRED_SECTIONS = ("Introduction", "Conclusion")
+_MIN_SECTION_WORDS = 15 # Introduction/Conclusion shorter than this are left to the LLM judge
+
+# Returned when there is no draft to review; copied with the current date/attempt count (no re-validation)
+_ERROR_DRAFT = Newsletter(
+    date=datetime.min,
+    subject="ERROR: No Draft Available",
+    content_markdown="No newsletter draft was available for review due to a prior error.",
+    is_approved=False,
+    approval_score=0.0,
+    feedback="No newsletter draft available for review.",
+    revision_attempts=0
+)
+
+# Serializer for the reference articles
+_SUMMARIZED_ADAPTER = TypeAdapter(List[SummarizedContent])
+
+# Last serialized summarized_content, held by reference so the identity check below cannot match a recycled id()
+_summarized_json_cache: Dict[str, Any] = {'content': None, 'json': ''}
+
+def _summarized_articles_json(summarized_content: List[SummarizedContent]) -> str:
+    """
+    Returns the indented JSON of the summarized articles. The same list comes back on every revision
+    review of a run, so it is serialized only the first time (in a single pydantic-core pass, no intermediate dicts).
+    """
+    if _summarized_json_cache['content'] is not summarized_content:
+        _summarized_json_cache['json'] = _SUMMARIZED_ADAPTER.dump_json(summarized_content, indent=2).decode()
+        _summarized_json_cache['content'] = summarized_content
+    return _summarized_json_cache['json']
+
+def _deterministic_review(newsletter_draft: Newsletter, summarized_content: List[SummarizedContent]) -> Optional[EditorialReview]:
+    """
+    Cheap local review of the draft's structure and summaries: required sections, one summary and one Read More link
+    per article, no placeholder summaries from failed extractions, summaries and link targets taken from the summarized
+    articles, and non-trivial introduction/conclusion text.
+    Returns a failing review (score 0.0) for a clearly broken draft and None otherwise: passing the structural checks
+    says nothing about content quality, so only the LLM judge can approve a draft.
+    """
+    content = newsletter_draft.content_markdown.strip()
+    if not content:
+        return EditorialReview(quality_score=0.0, feedback="The newsletter draft is empty.",
+                               issues_found=[EditorialIssue(type="Formatting", description="No content was generated.")])
+
+    fatal: List[EditorialIssue] = []
+    minor: List[EditorialIssue] = []
+    section_words: Dict[str, int] = {}
+    current_section: Optional[str] = None
+    article_count = 0
+    summaries: List[str] = []
+    link_urls: List[str] = []
+    for line in content.splitlines():
+        heading = _HEADING_RE.match(line)
+        if heading:
+            if heading.group(1) == '##':
+                current_section = heading.group(2)
+                section_words.setdefault(current_section, 0)
+            else:
+                article_count += 1
+            continue
+        stripped = line.strip()
+        if stripped.startswith("- Summary:"):
+            summaries.append(stripped[len("- Summary:"):].strip())
+        link_urls.extend(_READ_MORE_RE.findall(line))
+        if current_section in _REQUIRED_SECTIONS:
+            section_words[current_section] += len(stripped.split())
+
+    for name in _REQUIRED_SECTIONS:
+        if name not in section_words:
+            fatal.append(EditorialIssue(type="Formatting", description=f"Missing '## {name}' section."))
+        elif section_words[name] < _MIN_SECTION_WORDS:
+            minor.append(EditorialIssue(type="Clarity", description=f"The {name} is very short ({section_words[name]} words)."))
+    if article_count == 0:
+        fatal.append(EditorialIssue(type="Formatting", description="No articles ('### Title' headings) found."))
+    if len(link_urls) < article_count:
+        fatal.append(EditorialIssue(type="Factual Accuracy", description=f"{article_count - len(link_urls)} article(s) lack a 'Read More' link."))
+    elif len(link_urls) > article_count:
+        minor.append(EditorialIssue(type="Formatting", description="Some articles have more than one 'Read More' link."))
+    if len(summaries) < article_count:
+        minor.append(EditorialIssue(type="Formatting", description=f"{article_count - len(summaries)} article(s) lack a '- Summary:' line."))
+    placeholder_count = sum(1 for summary in summaries if summary.startswith(FALLBACK_SUMMARY_PREFIX))
+    if placeholder_count:
+        fatal.append(EditorialIssue(type="Factual Accuracy", description=f"{placeholder_count} article(s) carry a placeholder summary from a failed extraction."))
+    source_summaries = " ".join(" ".join(c.summary.split()) for c in summarized_content)
+    unsourced_count = sum(1 for summary in summaries if " ".join(summary.split()) not in source_summaries)
+    if unsourced_count:
+        minor.append(EditorialIssue(type="Factual Accuracy", description=f"{unsourced_count} summary(ies) differ from the source summaries."))
+    known_urls: Set[str] = {c.original_url.strip() for c in summarized_content}
+    unknown_urls = [url for url in link_urls if url not in known_urls]
+    if unknown_urls:
+        minor.append(EditorialIssue(type="Factual Accuracy", description=f"Links not found in the source articles: {', '.join(unknown_urls[:5])}"))
+
+    if fatal:
+        return EditorialReview(quality_score=0.0, feedback="The draft fails basic structural and content checks.", issues_found=fatal + minor)
+    return None
+
+def _llm_review(newsletter_draft: Newsletter, summarized_content: List[SummarizedContent], revision_attempts: int) -> EditorialReview:
+    """
+    Scores the draft with the LLM judge against the editorial rubric and the summarized source articles.
+    Raises if the response cannot be parsed into an EditorialReview.
+    """
+    logger.info(f"EDITORIAL AGENT: Invoking LLM to review newsletter draft (Attempt {revision_attempts + 1}).")
+    # Prepare summarized content for LLM's factual verification (serialized once, reused by revision reviews)
+    summarized_articles_json_str = _summarized_articles_json(summarized_content)
+    # Ensure the prompt is correctly formatted for the LLM
+    prompt_messages = EDITORIAL_REVIEW_PROMPT.format_messages(
+        subject=newsletter_draft.subject,
+        content_markdown=newsletter_draft.content_markdown,
+        summarized_articles_json=summarized_articles_json_str
+    )
+    response_content = editorial_llm.invoke(prompt_messages) # Invoke with formatted messages
+
+    # Safely extract content from LLM response (handle both BaseMessage and str)
+    llm_raw_output_str = response_content.content if hasattr(response_content, 'content') else str(response_content)
+
+    try:
+        # JSON mode (Ollama) already yields a bare object, which passes through repair_json unchanged. For providers
+        # without JSON mode, one repair pass handles code fences, surrounding prose, stray inner quotes and trailing commas.
+        repaired_json_str = repair_json(llm_raw_output_str)
+        if not repaired_json_str.startswith('{'):
+            raise ValueError(f"No JSON object could be repaired from the response: {llm_raw_output_str[:100]}...")
+        review = EditorialReview.model_validate_json(repaired_json_str)
+    except ValueError as e: # Invalid JSON/schema (pydantic's ValidationError is a ValueError)
+        logger.warning(f"EDITORIAL AGENT: Repaired JSON failed for editorial review: {e}. Falling back to cleaning with inner quote escape.")
+        # Single fallback pass; a response that still cannot be parsed raises to the outer except (score 0.0)
+        review = EditorialReview.model_validate_json(escape_quotes_in_json_string_values(clean_json_string(llm_raw_output_str)))
+    return review
+
+def editorial_agent_node(state: AgentState) -> Dict[str, Any]:
     """
     Editorial Agent node: Reviews the generated newsletter draft for quality,
     factual accuracy, and adherence to guidelines.
-    - Uses an LLM (as a 'judge') to score the newsletter and provide feedback.
+    - Uses an LLM (as a 'judge') to score the newsletter and provide feedback; on the first review, drafts that
+      clearly fail deterministic structural checks are rejected without the LLM.
     - Determines if the newsletter needs revision based on the quality score and revision attempts.
     - Updates 'newsletter_draft', 'is_approved', 'feedback', 'revision_needed', 'revision_attempts' in the state.
+    - Returns only the updated keys; LangGraph merges them into the shared state.
     """
     logger.info("---EDITORIAL AGENT: Starting newsletter review---")
 
@@ -33,102 +171,51 @@ def editorial_agent_node(state: AgentState) -> AgentState:
 
     if not newsletter_draft:
         logger.error("EDITORIAL AGENT: No newsletter draft found in state. Cannot perform review.")
-        new_state = state.copy()
-        new_state['newsletter_draft'] = Newsletter(
-            date=datetime.now(),
-            subject="ERROR: No Draft Available",
-            content_markdown="No newsletter draft was available for review due to a prior error.",
-            is_approved=False,
-            approval_score=0.0,
-            feedback="No newsletter draft available for review.",
-            revision_attempts=revision_attempts
-        )
-        new_state['revision_needed'] = False # Can't revise if no draft
-        return new_state
+        error_draft = _ERROR_DRAFT.model_copy(update={'date': datetime.now(), 'revision_attempts': revision_attempts})
+        return {'newsletter_draft': error_draft, 'revision_needed': False, 'revision_attempts': revision_attempts} # Can't revise if no draft
     
-    # Prepare summarized content for LLM's factual verification
-    summarized_articles_json_str = json.dumps([
-        sa.model_dump() for sa in summarized_content
-    ], indent=2)
-
     try:
-        logger.info(f"EDITORIAL AGENT: Invoking LLM to review newsletter draft (Attempt {revision_attempts + 1}).")
-        # Ensure the prompt is correctly formatted for the LLM
-        prompt_messages = EDITORIAL_REVIEW_PROMPT.format_messages(
-            subject=newsletter_draft.subject,
-            content_markdown=newsletter_draft.content_markdown,
-            summarized_articles_json=summarized_articles_json_str
-        )
-        response_content = editorial_llm.invoke(prompt_messages) # Invoke with formatted messages
-
-        # Safely extract content from LLM response (handle both BaseMessage and str)
-        llm_raw_output_str = response_content.content if hasattr(response_content, 'content') else str(response_content)
-
+        # First review only: a draft that clearly fails the structural checks needs no LLM judge (passing drafts always get one)
+        review = _deterministic_review(newsletter_draft, summarized_content) if _DETERMINISTIC_PRECHECK and revision_attempts == 0 else None
+        if review is not None:
+            logger.info(f"EDITORIAL AGENT: Draft failed structural checks (Score: {review.quality_score:.2f}). Skipping LLM review.")
+        else:
+            review = _llm_review(newsletter_draft, summarized_content, revision_attempts)
 
-        parsed_llm_output = {}
-        original_response_for_retry = llm_raw_output_str # Keep a copy for retry attempts
-        
-        try_count = 0
-        max_tries = 3
-
-        while try_count < max_tries:
-            try:
-                # Use the robust clean_json_string from utils for first pass
-                cleaned_json_str = clean_json_string(original_response_for_retry)
-                
-                # Assert for debugging: ensures the cleaned string actually looks like JSON
-                assert cleaned_json_str.startswith('{') and cleaned_json_str.endswith('}'), \
-                    f"Cleaned JSON string does not start/end with braces for scoring: {cleaned_json_str[:100]}..."
-
-                parsed_llm_output = json.loads(cleaned_json_str)
-                break # Parsing successful, break loop
-            except (json.JSONDecodeError, ValueError) as e: # Catch both JSON parsing and ValueError from clean_json_string
-                logger.warning(f"EDITORIAL AGENT: JSONDecodeError/ValueError for editorial review on try {try_count+1}: {e}. Raw response (cleaned, first 500 chars): '{cleaned_json_str[:500]}...'")
-                
-                if try_count < max_tries - 1: # Only apply retry fix if there's at least one more try
-                    # Apply a targeted escape for problematic internal quotes and retry
-                    original_response_for_retry = escape_quotes_in_json_string_values(original_response_for_retry)
-                    logger.warning(f"EDITORIAL AGENT: Attempting inner quote escape and retry for editorial review.")
-                
-                try_count += 1
-                if try_count == max_tries:
-                    logger.error(f"EDITORIAL AGENT: Max retries reached for JSON parsing for editorial review. Setting score to 0.0.")
-                    raise # Re-raise after max tries to trigger the outer except
-
-        quality_score = float(parsed_llm_output.get('quality_score', 0.0))
-        # We ignore LLM's direct 'is_approved' flag here and rely solely on our threshold logic
-        feedback_from_llm = parsed_llm_output.get('feedback', 'No specific feedback provided.')
-        issues_found = parsed_llm_output.get('issues_found', [])
+        quality_score = review.quality_score
+        # We ignore LLM's direct 'is_approved' flag here (not part of EditorialReview) and rely solely on our threshold logic
+        feedback_from_llm = review.feedback
+        issues_found = review.issues_found
         
-        logger.info(f"EDITORIAL AGENT: LLM review complete. Score: {quality_score:.2f}.")
+        logger.info(f"EDITORIAL AGENT: Review complete. Score: {quality_score:.2f}.")
         
         # --- Determine final approval status based on score and attempts ---
         final_is_approved = False
         revision_needed = False
         overall_feedback = feedback_from_llm # Start with LLM's feedback
 
-        if quality_score >= settings.EDITORIAL_MIN_QUALITY_SCORE:
+        if quality_score >= _MIN_SCORE:
             final_is_approved = True
             logger.info("EDITORIAL AGENT: Newsletter approved based on quality score threshold.")
             overall_feedback = "Approved."
         else:
-            logger.warning(f"EDITORIAL AGENT: Newsletter score ({quality_score:.2f}) below threshold ({settings.EDITORIAL_MIN_QUALITY_SCORE}).")
+            logger.warning(f"EDITORIAL AGENT: Newsletter score ({quality_score:.2f}) below threshold ({_MIN_SCORE}).")
             
-            if revision_attempts < settings.EDITORIAL_MAX_REVISION_ATTEMPTS:
+            if revision_attempts < _MAX_REV:
                 revision_needed = True
-                logger.info(f"EDITORIAL AGENT: Revision needed. Attempt {revision_attempts + 1}/{settings.EDITORIAL_MAX_REVISION_ATTEMPTS}.")
+                logger.info(f"EDITORIAL AGENT: Revision needed. Attempt {revision_attempts + 1}/{_MAX_REV}.")
                 overall_feedback = f"Revision requested (Attempt {revision_attempts + 1}): {overall_feedback}"
                 # Add specific issues to feedback if available
                 if issues_found:
-                    issue_descriptions = [f"- {issue.get('type', 'Unknown Type')}: {issue.get('description', 'No description')}" for issue in issues_found]
+                    issue_descriptions = [f"- {issue.type}: {issue.description}" for issue in issues_found]
                     overall_feedback += "\n\nIssues Found:\n" + "\n".join(issue_descriptions)
             else:
-                logger.error(f"EDITORIAL AGENT: Max revision attempts ({settings.EDITORIAL_MAX_REVISION_ATTEMPTS}) reached. Newsletter NOT approved.")
+                logger.error(f"EDITORIAL AGENT: Max revision attempts ({_MAX_REV}) reached. Newsletter NOT approved.")
                 final_is_approved = False
                 revision_needed = False
                 overall_feedback = f"Max revision attempts reached. Newsletter NOT approved. Final Feedback: {overall_feedback}"
                 if issues_found:
-                    issue_descriptions = [f"- {issue.get('type', 'Unknown Type')}: {issue.get('description', 'No description')}" for issue in issues_found]
+                    issue_descriptions = [f"- {issue.type}: {issue.description}" for issue in issues_found]
                     overall_feedback += "\n\nFinal Issues:\n" + "\n".join(issue_descriptions)
 
         # Update the newsletter draft object and state
@@ -145,16 +232,16 @@ def editorial_agent_node(state: AgentState) -> AgentState:
         newsletter_draft.approval_score = 0.0
         newsletter_draft.feedback = "Critical internal error during editorial review. Manual intervention required."
         newsletter_draft.revision_attempts = revision_attempts + 1 # Still count this as an attempt
-        revision_needed = True if revision_attempts < settings.EDITORIAL_MAX_REVISION_ATTEMPTS else False # Attempt revision if not maxed out
+        revision_needed = True if revision_attempts < _MAX_REV else False # Attempt revision if not maxed out
 
     logger.info("---EDITORIAL AGENT: Completed newsletter review---")
 
     # Update the state with the modified newsletter draft and revision flags
-    new_state = state.copy()
-    new_state['newsletter_draft'] = newsletter_draft
-    new_state['revision_needed'] = revision_needed
-    new_state['revision_attempts'] = newsletter_draft.revision_attempts # Ensure this is updated for graph routing
-    return new_state
+    return {
+        'newsletter_draft': newsletter_draft,
+        'revision_needed': revision_needed,
+        'revision_attempts': newsletter_draft.revision_attempts # Ensure this is updated for graph routing
+    }
 
 # Example usage (for testing purposes)
 if __name__ == "__main__":
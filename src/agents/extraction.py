@@ -1,132 +1,453 @@
-import json
-from typing import List, Dict, Any, Optional
-import re # Import re for regex operations
-import unicodedata # Import unicodedata for advanced string cleaning
+import asyncio
+import hashlib
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import lru_cache
+from typing import List, Dict, Any, Optional, Set
+
+import orjson # Compact serialization of batch prompt payloads
 
 from src.config import get_settings
-from src.utils import logger, clean_json_string, load_state_from_json, save_state_to_json, DATA_DIR 
-from src.tools.llm_interface import get_default_llm
-from src.models.research_models import RawArticle, SummarizedContent
-from src.prompts.extraction_prompts import EXTRACTION_PROMPT, RESUMMARIZE_PROMPT # Ensure both prompts are imported
+from src.utils import logger, load_state_from_json, save_state_to_json, DATA_DIR 
+from src.tools.llm_interface import get_default_llm, get_default_embeddings, model_identity, invoke_structured, ainvoke_structured, astream_json_items, save_response_cache
+from src.tools.content_cache import ContentCache
+from src.models.research_models import RawArticle, SummarizedContent, ArticleExtraction, ArticleExtractionBatch, BatchArticleExtraction, FALLBACK_SUMMARY_PREFIX
+from src.prompts.extraction_prompts import EXTRACTION_PROMPT, EXTRACTION_BATCH_PROMPT
 from src.state import AgentState # Ensure AgentState is imported
 
 # Load application settings
 settings = get_settings()
 
-# Initialize the LLM for this agent
-extraction_llm = get_default_llm()
+# Initialize the LLM for this agent (JSON mode: every extraction prompt expects a JSON object back).
+# get_default_llm is memoized, so this is the same client the editorial agent uses.
+extraction_llm = get_default_llm(json_mode=True)
+
+# Persistent cache of extraction results keyed by article URL + content (exact + optional semantic tier)
+extraction_cache = ContentCache("extraction_summaries", semantic_threshold=settings.EXTRACTION_SEMANTIC_CACHE_THRESHOLD) if settings.EXTRACTION_CACHE_ENABLED else None
+use_semantic_cache = settings.EXTRACTION_CACHE_ENABLED and settings.EXTRACTION_SEMANTIC_CACHE_ENABLED
+# Bump when the extraction prompts change so summaries produced by the old prompts are not reused
+_EXTRACTION_PROMPT_VERSION = "3"
+# Exact-tier key parts shared by every article: summaries from another model or prompt version are never reused
+_CACHE_KEY_CONTEXT = (model_identity(extraction_llm), _EXTRACTION_PROMPT_VERSION)
+extraction_embeddings = get_default_embeddings() if use_semantic_cache else None
+
+# Rough characters-per-token ratio for English text; the local models' tokenizers are not available client-side
+_CHARS_PER_TOKEN = 4
 
-def extraction_agent_node(state: AgentState) -> AgentState:
+# Settings read on every article, resolved once at import
+_MAX_SUMMARY_LENGTH = settings.MAX_SUMMARY_LENGTH
+_MAX_ARTICLE_CHARS = settings.MAX_ARTICLE_CHUNK_SIZE * _CHARS_PER_TOKEN
+_USE_THREADS = settings.EXTRACTION_EXECUTOR.lower() == "threads"
+_STREAM_BATCH_ENTRIES = settings.LLM_STREAM_JSON_RESPONSES
+
+def _truncate_at_word(text: str, max_chars: int, suffix: str = "") -> str:
     """
-    Extraction Agent node: Processes raw articles to extract key information and summarize them.
-    - Uses an LLM to generate summaries, key entities, and identified trends.
-    - Handles re-summarization if the initial summary is too long.
-    - Updates the 'summarized_content' field in the state.
+    Cuts text to at most max_chars characters (suffix included), at the last whitespace before the limit when there is one.
+    Text within the limit is returned as-is (no copy); otherwise the boundary is searched in place and a single slice is made.
     """
-    logger.info("---EXTRACTION AGENT: Starting information extraction and summarization---")
+    if len(text) <= max_chars:
+        return text
+    limit = max_chars - len(suffix)
+    # Don't discard more than half the budget for a very long "word" (e.g., a URL)
+    boundary = text.rfind(' ', limit // 2 + 1, limit)
+    return text[:boundary if boundary != -1 else limit].rstrip() + suffix
 
-    raw_articles: List[RawArticle] = state.get('raw_articles', [])
-    if not raw_articles:
-        logger.warning("EXTRACTION AGENT: No raw articles found in state. Skipping extraction.")
-        new_state = state.copy()
-        new_state['summarized_content'] = []
-        return new_state
+def _truncate_at_sentence(text: str, max_chars: int) -> str:
+    """
+    Cuts an over-long summary at the last sentence end within max_chars when that keeps at least 70% of the budget
+    (a complete sentence reads better than an ellipsis); otherwise falls back to a word boundary plus "...".
+    """
+    if len(text) <= max_chars:
+        return text
+    cut = text.rfind('. ', 0, max_chars)
+    if cut >= max_chars * 0.7:
+        return text[:cut + 1]
+    return _truncate_at_word(text, max_chars, "...")
+
+@lru_cache(maxsize=256)
+def _budgeted_text(text: str) -> str:
+    # Memoized: the prompt, batch sizing and cache key all need an article's text, and a long one is cut only once
+    # (str hashes are cached on the object, so repeat lookups do not rehash the content)
+    return _truncate_at_word(text, _MAX_ARTICLE_CHARS)
+
+def _article_text_for_llm(article: RawArticle) -> str:
+    # Fallback to title if no content/snippet. Long content is cut to the MAX_ARTICLE_CHUNK_SIZE token budget up front.
+    return _budgeted_text(article.content if article.content else article.title)
+
+def _extraction_prompt(article: RawArticle):
+    return EXTRACTION_PROMPT.format(
+        title=article.title,
+        url=article.url,
+        content=_article_text_for_llm(article),
+        max_summary_length=_MAX_SUMMARY_LENGTH
+    )
+
+def _batch_extraction_prompt(batch: List[RawArticle]):
+    articles_json = orjson.dumps([
+        {
+            "id": idx,
+            "title": a.title,
+            "url": a.url,
+            "content": _article_text_for_llm(a)
+        }
+        for idx, a in enumerate(batch)
+    ]).decode()
+    return EXTRACTION_BATCH_PROMPT.format(
+        articles_json=articles_json,
+        max_summary_length=_MAX_SUMMARY_LENGTH
+    )
+
+def _make_batches(articles: List[RawArticle]) -> List[List[RawArticle]]:
+    """
+    Groups articles into as few extraction batches as possible, one LLM call per batch. A batch is closed when it
+    reaches settings.EXTRACTION_BATCH_SIZE articles or its serialized articles would exceed
+    settings.EXTRACTION_BATCH_MAX_PROMPT_CHARS (a character proxy for the model's context budget).
+    """
+    batch_size = max(1, settings.EXTRACTION_BATCH_SIZE)
+    if batch_size == 1:
+        return [[a] for a in articles]
+
+    batches: List[List[RawArticle]] = []
+    current: List[RawArticle] = []
+    current_chars = 0
+    for article in articles:
+        # Approximate size of the article's entry in articles_json (fields plus JSON overhead)
+        article_chars = len(article.title) + len(article.url) + len(_article_text_for_llm(article)) + 60
+        if current and (len(current) >= batch_size or current_chars + article_chars > settings.EXTRACTION_BATCH_MAX_PROMPT_CHARS):
+            batches.append(current)
+            current, current_chars = [], 0
+        current.append(article)
+        current_chars += article_chars
+    if current:
+        batches.append(current)
+    return batches
+
+def _fallback_summarized_content(article: RawArticle) -> SummarizedContent:
+    """
+    Placeholder summarized content for an article that could not be processed.
+    """
+    return SummarizedContent.model_construct(
+        original_url=article.url,
+        title=article.title,
+        summary=f"{FALLBACK_SUMMARY_PREFIX} Original content snippet: {article.content[:_MAX_SUMMARY_LENGTH] if article.content else 'N/A'}",
+        key_entities=[],
+        trends_identified=[]
+    )
+
+def _to_summarized_content(article: RawArticle, extraction: ArticleExtraction) -> SummarizedContent:
+    """
+    Builds the SummarizedContent for an extracted article, clipping an over-long summary at a sentence (or word) boundary.
+    """
+    max_summary_chars = _MAX_SUMMARY_LENGTH
+    summary = extraction.summary
+
+    # Post-processing: ensure summary length constraints (hard guard, no extra LLM round-trip)
+    if len(summary) > max_summary_chars:
+        logger.warning("Summary for '%s' is too long (%d chars). Truncating to %d.", article.title, len(summary), max_summary_chars)
+        summary = _truncate_at_sentence(summary, max_summary_chars)
+
+    logger.info("EXTRACTION AGENT: Successfully processed '%s'.", article.title)
+    # Every field comes from an already-validated RawArticle/ArticleExtraction, so validation is skipped
+    return SummarizedContent.model_construct(
+        original_url=article.url,
+        title=article.title,
+        summary=summary,
+        key_entities=extraction.key_entities,
+        trends_identified=extraction.trends_identified
+    )
+
+async def _extract_article(article: RawArticle, semaphore: asyncio.Semaphore) -> SummarizedContent:
+    """
+    Summarizes a single article and extracts its key entities and trends using the LLM.
+    The semaphore bounds the number of in-flight LLM requests to respect provider rate limits.
+    On any error the article falls back to a placeholder summary.
+    """
+    try:
+        async with semaphore:
+            logger.info("EXTRACTION AGENT: Processing article: %s", article.title)
+            extraction = await ainvoke_structured(extraction_llm, _extraction_prompt(article), ArticleExtraction)
+        return _to_summarized_content(article, extraction)
+    except ValueError as e: # Unparseable/invalid response (incl. pydantic's ValidationError): expected, no traceback
+        logger.warning("EXTRACTION AGENT: Could not parse the response for '%s': %s", article.title, e)
+        return _fallback_summarized_content(article)
+    except Exception as e:
+        logger.error(f"EXTRACTION AGENT: Failed to process article '{article.title}' due to error: {e}", exc_info=True)
+        # Add a placeholder summarized content for failed articles
+        return _fallback_summarized_content(article)
+
+async def _extract_batch(batch: List[RawArticle], semaphore: asyncio.Semaphore) -> List[SummarizedContent]:
+    """
+    Extracts a batch of articles with a single LLM call (EXTRACTION_BATCH_PROMPT).
+    Articles the LLM omits or returns invalid (or the whole batch, if the call fails before any entry arrives)
+    are extracted individually via _extract_article.
+    """
+    extractions_by_id: Dict[int, ArticleExtraction] = {}
+    try:
+        async with semaphore:
+            logger.info("EXTRACTION AGENT: Processing batch of %d articles.", len(batch))
+            if _STREAM_BATCH_ENTRIES:
+                # Each entry is validated as soon as it has streamed in; entries completed before a failure are kept
+                async for item_json in astream_json_items(extraction_llm, _batch_extraction_prompt(batch)):
+                    try:
+                        item = BatchArticleExtraction.model_validate_json(item_json)
+                    except ValueError as e:
+                        logger.warning("EXTRACTION AGENT: Skipping invalid batch entry: %s", e)
+                        continue
+                    extractions_by_id[item.id] = item
+            else:
+                batch_output = await ainvoke_structured(extraction_llm, _batch_extraction_prompt(batch), ArticleExtractionBatch)
+                extractions_by_id = {item.id: item for item in batch_output.extractions}
+    except ValueError as e: # Unparseable/invalid batch response: expected, no traceback
+        logger.warning("EXTRACTION AGENT: Could not parse the batch response for %d articles: %s", len(batch), e)
+    except Exception as e:
+        logger.error(f"EXTRACTION AGENT: Error during batch extraction of {len(batch)} articles: {e}", exc_info=True)
+
+    missing = sum(1 for idx in range(len(batch)) if idx not in extractions_by_id)
+    if missing:
+        logger.warning("EXTRACTION AGENT: %d article(s) missing from batch response. Extracting individually.", missing)
+
+    async def _finish(idx: int, article: RawArticle) -> SummarizedContent:
+        extraction = extractions_by_id.get(idx)
+        if extraction is None:
+            return await _extract_article(article, semaphore)
+        try:
+            return _to_summarized_content(article, extraction)
+        except Exception as e:
+            logger.error(f"EXTRACTION AGENT: Failed to process article '{article.title}' due to error: {e}", exc_info=True)
+            return _fallback_summarized_content(article)
+
+    return list(await asyncio.gather(*[_finish(idx, article) for idx, article in enumerate(batch)]))
+
+async def _extract_articles(articles: List[RawArticle]) -> List[SummarizedContent]:
+    """
+    Processes all articles concurrently with asyncio.gather, bounded by settings.LLM_MAX_CONCURRENCY.
+    Articles are sent EXTRACTION_BATCH_SIZE per LLM call. Results are returned in the same order as the input list.
+    """
+    semaphore = asyncio.Semaphore(settings.LLM_MAX_CONCURRENCY)
+    batches = _make_batches(articles)
+    if settings.EXTRACTION_BATCH_SIZE <= 1:
+        tasks = [_extract_article(batch[0], semaphore) for batch in batches]
+    else:
+        tasks = [_extract_batch(batch, semaphore) for batch in batches]
+    results = await asyncio.gather(*tasks, return_exceptions=True)
 
     summarized_content: List[SummarizedContent] = []
-    
-    # Define LLM specific length limits if different from general summary length
-    # This might be used to chunk articles before sending to LLM if they are too long for context window.
-    # For now, we'll assume the entire raw_article.content can fit, but this is where
-    # MAX_ARTICLE_CHUNK_SIZE would typically be used to break down very long articles.
-    max_summary_chars = settings.MAX_SUMMARY_LENGTH
-    # max_llm_input_tokens = settings.MAX_ARTICLE_CHUNK_SIZE # Not directly used for simple summary here, but available if content parsing is added
-
-    for i, article in enumerate(raw_articles):
-        logger.info(f"EXTRACTION AGENT: Processing article {i+1}/{len(raw_articles)}: {article.title}")
+    for batch, result in zip(batches, results):
+        if isinstance(result, BaseException):
+            # Extraction coroutines handle their own errors; this only catches failures outside their try blocks.
+            logger.error(f"EXTRACTION AGENT: Extraction task failed for {len(batch)} article(s): {result}")
+            summarized_content.extend(_fallback_summarized_content(article) for article in batch)
+        elif isinstance(result, SummarizedContent):
+            summarized_content.append(result)
+        else:
+            summarized_content.extend(result)
+    return summarized_content
+
+def _extract_article_sync(article: RawArticle) -> SummarizedContent:
+    """
+    Blocking variant of _extract_article for the thread-pool executor.
+    """
+    try:
+        logger.info("EXTRACTION AGENT: Processing article: %s", article.title)
+        return _to_summarized_content(article, invoke_structured(extraction_llm, _extraction_prompt(article), ArticleExtraction))
+    except ValueError as e:
+        logger.warning("EXTRACTION AGENT: Could not parse the response for '%s': %s", article.title, e)
+        return _fallback_summarized_content(article)
+    except Exception as e:
+        logger.error(f"EXTRACTION AGENT: Failed to process article '{article.title}' due to error: {e}", exc_info=True)
+        return _fallback_summarized_content(article)
+
+def _extract_batch_sync(batch: List[RawArticle]) -> List[SummarizedContent]:
+    """
+    Blocking variant of _extract_batch for the thread-pool executor (articles missing from the response are
+    extracted individually on the same worker).
+    """
+    extractions_by_id: Dict[int, ArticleExtraction] = {}
+    try:
+        logger.info("EXTRACTION AGENT: Processing batch of %d articles.", len(batch))
+        batch_output = invoke_structured(extraction_llm, _batch_extraction_prompt(batch), ArticleExtractionBatch)
+        extractions_by_id = {item.id: item for item in batch_output.extractions}
+    except ValueError as e:
+        logger.warning("EXTRACTION AGENT: Could not parse the batch response for %d articles: %s", len(batch), e)
+    except Exception as e:
+        logger.error(f"EXTRACTION AGENT: Error during batch extraction of {len(batch)} articles: {e}", exc_info=True)
+
+    summarized_content: List[SummarizedContent] = []
+    for idx, article in enumerate(batch):
+        extraction = extractions_by_id.get(idx)
+        if extraction is None:
+            summarized_content.append(_extract_article_sync(article))
+            continue
         try:
-            # Prepare content for the LLM. If raw_article.content is too large, it needs chunking.
-            # For now, we use the snippet/summary from research, which should be short enough.
-            article_text_for_llm = article.content if article.content else article.title # Fallback to title if no content/snippet
-
-            # Invoke LLM for initial extraction
-            prompt = EXTRACTION_PROMPT.format(
-                title=article.title,
-                url=article.url,
-                content=article_text_for_llm,
-                max_summary_length=max_summary_chars
-            )
-            response_content = extraction_llm.invoke(prompt)
-
-            parsed_llm_output = {}
-            try_count = 0
-            max_tries = 3
-
-            while try_count < max_tries:
-                try:
-                    # Use the robust clean_json_string from utils
-                    cleaned_json_str = clean_json_string(response_content)
-                    
-                    # Assert for debugging: ensures the cleaned string actually looks like JSON
-                    assert cleaned_json_str.startswith('{') and cleaned_json_str.endswith('}'), \
-                        f"Cleaned JSON string does not start/end with braces: {cleaned_json_str[:100]}..."
-
-                    parsed_llm_output = json.loads(cleaned_json_str)
-                    break
-                except json.JSONDecodeError as e:
-                    logger.warning(f"EXTRACTION AGENT: JSONDecodeError for '{article.title}' on try {try_count+1}: {e}. Raw response (cleaned, first 500 chars): '{cleaned_json_str[:500]}...'")
-                    try_count += 1
-                    if try_count == max_tries:
-                        logger.error(f"EXTRACTION AGENT: Max retries reached for JSON parsing for '{article.title}'. Falling back to default summary.")
-                        raise # Re-raise after max tries to trigger the outer except
-                except ValueError as e: # Catch ValueError from clean_json_string if no braces found
-                    logger.error(f"EXTRACTION AGENT: Parsing failed for '{article.title}' due to structural error after cleaning: {e}. Raw response: '{response_content[:500]}...'")
-                    raise # Re-raise to trigger the outer except for default handling
-
-            summary = parsed_llm_output.get('summary', 'No summary generated.').strip()
-            # Add .rstrip(',') to clean trailing commas from individual string elements
-            key_entities = [e.strip().rstrip(',') for e in parsed_llm_output.get('key_entities', []) if isinstance(e, str)]
-            trends_identified = [t.strip().rstrip(',') for t in parsed_llm_output.get('trends_identified', []) if isinstance(t, str)]
-
-            # Post-processing: ensure summary length constraints
-            if len(summary) > max_summary_chars:
-                logger.warning(f"Summary for '{article.title}' is too long ({len(summary)} chars). Re-summarizing.")
-                resummarize_prompt = RESUMMARIZE_PROMPT.format(
-                    text=summary,
-                    max_summary_length=max_summary_chars
-                )
-                shortened_summary = extraction_llm.invoke(resummarize_prompt).content
-                summary = shortened_summary.strip()
-                logger.info(f"Summary shortened to {len(summary)} characters.")
-
-            summarized_content.append(
-                SummarizedContent(
-                    original_url=article.url,
-                    title=article.title,
-                    summary=summary,
-                    key_entities=key_entities,
-                    trends_identified=trends_identified
-                )
-            )
-            logger.info(f"EXTRACTION AGENT: Successfully processed '{article.title}'.")
-            
+            summarized_content.append(_to_summarized_content(article, extraction))
         except Exception as e:
             logger.error(f"EXTRACTION AGENT: Failed to process article '{article.title}' due to error: {e}", exc_info=True)
-            # Add a placeholder summarized content for failed articles
-            summarized_content.append(
-                SummarizedContent(
-                    original_url=article.url,
-                    title=article.title,
-                    summary=f"Could not process article due to an error. Original content snippet: {article.content[:max_summary_chars] if article.content else 'N/A'}",
-                    key_entities=[],
-                    trends_identified=[]
-                )
+            summarized_content.append(_fallback_summarized_content(article))
+    return summarized_content
+
+def _extract_articles_threaded(articles: List[RawArticle]) -> List[SummarizedContent]:
+    """
+    Extracts all articles on a ThreadPoolExecutor of settings.LLM_MAX_CONCURRENCY workers using the
+    sync LLM client (network-bound calls release the GIL). Results keep the input order.
+    """
+    batches = _make_batches(articles)
+    results: List[List[SummarizedContent]] = [[] for _ in batches]
+    with ThreadPoolExecutor(max_workers=max(1, settings.LLM_MAX_CONCURRENCY)) as pool:
+        if settings.EXTRACTION_BATCH_SIZE <= 1:
+            futures = {pool.submit(_extract_article_sync, batch[0]): idx for idx, batch in enumerate(batches)}
+        else:
+            futures = {pool.submit(_extract_batch_sync, batch): idx for idx, batch in enumerate(batches)}
+        for future in as_completed(futures):
+            idx = futures[future]
+            try:
+                result = future.result()
+                results[idx] = [result] if isinstance(result, SummarizedContent) else result
+            except Exception as e:
+                logger.error(f"EXTRACTION AGENT: Extraction task failed for {len(batches[idx])} article(s): {e}")
+                results[idx] = [_fallback_summarized_content(article) for article in batches[idx]]
+    return [content for batch_results in results for content in batch_results]
+
+async def _run_llm_extraction(articles: List[RawArticle], use_threads: bool = _USE_THREADS) -> List[SummarizedContent]:
+    """
+    Runs LLM extraction on the event loop by default, or on the thread pool (off the loop) when
+    EXTRACTION_EXECUTOR is "threads" (or use_threads is set by the caller).
+    """
+    if use_threads:
+        return await asyncio.to_thread(_extract_articles_threaded, articles)
+    return await _extract_articles(articles)
+
+def _embedding_text(article: RawArticle) -> str:
+    return f"{article.title}\n{_article_text_for_llm(article)[:1000]}"
+
+def _from_cached(article: RawArticle, cached: Dict[str, Any]) -> SummarizedContent:
+    # URL and title always come from the article itself (a semantic hit may have been cached for another URL)
+    return SummarizedContent(
+        original_url=article.url,
+        title=article.title,
+        summary=cached['summary'],
+        key_entities=cached['key_entities'],
+        trends_identified=cached['trends_identified']
+    )
+
+async def _extract_articles_with_cache(articles: List[RawArticle], use_threads: bool = _USE_THREADS) -> List[SummarizedContent]:
+    """
+    Extracts articles, skipping the LLM for any article found in the extraction cache.
+    Lookups try the exact tier (url + article text + summary length limit + model/prompt version) first, then, if enabled, the
+    semantic tier (embedding similarity of title + text head). Newly extracted articles are written back to the cache.
+    """
+    if extraction_cache is None:
+        return await _run_llm_extraction(articles, use_threads)
+
+    keys = [ContentCache.make_key(a.url, _article_text_for_llm(a), str(_MAX_SUMMARY_LENGTH), *_CACHE_KEY_CONTEXT) for a in articles]
+    results: List[Optional[SummarizedContent]] = [None] * len(articles)
+    vectors: Dict[int, List[float]] = {}
+    miss_indices: List[int] = []
+    exact_hits = semantic_hits = 0
+
+    for idx, (article, key) in enumerate(zip(articles, keys)):
+        cached = extraction_cache.get(key)
+        if cached is not None:
+            results[idx] = _from_cached(article, cached)
+            exact_hits += 1
+        else:
+            miss_indices.append(idx)
+
+    if miss_indices and use_semantic_cache:
+        try:
+            embedded = extraction_embeddings.embed_documents([_embedding_text(articles[i]) for i in miss_indices])
+            vectors = dict(zip(miss_indices, embedded))
+        except Exception as e:
+            logger.warning(f"EXTRACTION AGENT: Failed to embed articles for semantic cache lookup: {e}")
+        remaining_indices = []
+        for idx in miss_indices:
+            cached = extraction_cache.get_similar(vectors[idx]) if idx in vectors else None
+            if cached is not None:
+                results[idx] = _from_cached(articles[idx], cached)
+                semantic_hits += 1
+            else:
+                remaining_indices.append(idx)
+        miss_indices = remaining_indices
+
+    logger.info(f"EXTRACTION AGENT: Extraction cache hits: {exact_hits} exact, {semantic_hits} semantic; {len(miss_indices)} article(s) need LLM extraction.")
+    if miss_indices:
+        extracted = await _run_llm_extraction([articles[i] for i in miss_indices], use_threads)
+        for idx, content in zip(miss_indices, extracted):
+            results[idx] = content
+            # Placeholders for failed articles are never cached, so they are retried next run.
+            if content.summary.startswith(FALLBACK_SUMMARY_PREFIX):
+                continue
+            extraction_cache.set(
+                keys[idx],
+                {"summary": content.summary, "key_entities": content.key_entities, "trends_identified": content.trends_identified},
+                vectors.get(idx)
             )
+        extraction_cache.save()
+    return results
+
+def _deduplicate_articles(articles: List[RawArticle]) -> List[RawArticle]:
+    """
+    Drops repeated articles (same URL, or the same content returned by another source under a different URL),
+    keeping the first occurrence, so overlapping RSS/web-search/arXiv results are never sent to the LLM twice.
+    """
+    seen_urls: Set[str] = set()
+    seen_hashes: Set[bytes] = set()
+    unique_articles: List[RawArticle] = []
+    for article in articles:
+        url = article.url.strip()
+        # The leading 4 KB identify the content; hashing whole pages would only cost time
+        text = article.content.strip() if article.content else article.title
+        content_hash = hashlib.blake2b(text.encode('utf-8')[:4096], digest_size=16).digest()
+        if (url and url in seen_urls) or content_hash in seen_hashes:
+            logger.debug("EXTRACTION AGENT: Skipping duplicate article '%s' (%s).", article.title, url)
+            continue
+        if url:
+            seen_urls.add(url)
+        seen_hashes.add(content_hash)
+        unique_articles.append(article)
+    return unique_articles
+
+async def extraction_agent_node_async(state: AgentState, *, use_threads: bool = _USE_THREADS) -> Dict[str, Any]:
+    """
+    Extraction Agent node: Processes raw articles to extract key information and summarize them.
+    - Uses an LLM to generate summaries, key entities, and identified trends (articles are processed
+      concurrently and EXTRACTION_BATCH_SIZE per LLM call, at most LLM_MAX_CONCURRENCY calls in flight).
+    - Skips duplicate articles (same URL or content) before any LLM call.
+    - Cuts article content to the MAX_ARTICLE_CHUNK_SIZE token budget and clips over-long summaries.
+    - Returns only the updated 'summarized_content' key; LangGraph merges it into the shared state.
+    Runs on the graph's event loop when the graph is driven with ainvoke/astream.
+    use_threads overrides EXTRACTION_EXECUTOR for this run (the sync entry point sets it when a loop is already running).
+    """
+    logger.info("---EXTRACTION AGENT: Starting information extraction and summarization---")
+
+    raw_articles: List[RawArticle] = state.get('raw_articles', [])
+    if not raw_articles:
+        logger.warning("EXTRACTION AGENT: No raw articles found in state. Skipping extraction.")
+        return {'summarized_content': []}
+
+    unique_articles = _deduplicate_articles(raw_articles)
+    if len(unique_articles) < len(raw_articles):
+        logger.info("EXTRACTION AGENT: Deduplicated %d -> %d articles.", len(raw_articles), len(unique_articles))
+
+    logger.info(f"EXTRACTION AGENT: Processing {len(unique_articles)} articles (max {settings.LLM_MAX_CONCURRENCY} concurrent LLM calls, batch size {settings.EXTRACTION_BATCH_SIZE}).")
+    summarized_content = await _extract_articles_with_cache(unique_articles, use_threads)
+    save_response_cache()
 
     logger.info("---EXTRACTION AGENT: Completed information extraction and summarization---")
 
-    new_state = state.copy()
-    new_state['summarized_content'] = summarized_content
-    return new_state
+    return {'summarized_content': summarized_content}
+
+def extraction_agent_node(state: AgentState) -> Dict[str, Any]:
+    """
+    Synchronous entry point for the graph's stream()/invoke(); see extraction_agent_node_async.
+    When an event loop is already running in this thread (asyncio.run cannot be nested), the node runs on a
+    worker thread and extracts on the thread pool instead, as curation does for scoring.
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(extraction_agent_node_async(state))
+    logger.info("EXTRACTION AGENT: Event loop already running; extracting on a thread pool instead.")
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        return pool.submit(asyncio.run, extraction_agent_node_async(state, use_threads=True)).result()
 
 # Example usage (for testing purposes) - This section should be outside the agent node function
 if __name__ == "__main__":
@@ -1,21 +1,34 @@
-import json
 import re
 from typing import List, Dict, Any, Optional
 from datetime import datetime
 import markdown
-from premailer import transform
+import orjson # Fast serialization of the outline payload sent to the LLM
 
 from langchain_core.prompts import ChatPromptTemplate 
 
 from src.config import get_settings
-from src.utils import logger, clean_json_string, load_state_from_json, save_state_to_json, DATA_DIR 
-from src.tools.llm_interface import get_default_llm
+from src.utils import logger, load_state_from_json, save_state_to_json, DATA_DIR 
+from src.tools.llm_interface import get_default_llm, invoke_json, save_response_cache
 from src.models.newsletter_models import NewsletterOutline, Newsletter, NewsletterSection, NewsletterArticle
 from src.prompts.generation_prompts import GENERATION_PROMPT, NEWSLETTER_FOOTER 
 from src.state import AgentState
 
 settings = get_settings()
-generation_llm = get_default_llm()
+# JSON mode: the only LLM call here (intro, conclusion, trends) expects a JSON object back
+generation_llm = get_default_llm(json_mode=True)
+
+# --- Precompiled cleaning patterns (compiled once at import, reused on every generation) ---
+_TITLE_STRIP_CHARS = " \t\n\r,'\""
+_TITLE_READ_MORE_RE = re.compile(r'\s*\[?Read More\]?\(#?\)\s*$', re.IGNORECASE)
+# LLM residue removed in a single pass: a leading preamble, a trailing ``` block (and everything after it),
+# and the markdown HR + footer (the HTML template is the only source of the footer).
+_RESIDUE_RE = re.compile(
+    r'^(?:Here is the generated weekly AI Agent Development Newsletter content:\s*)+'
+    r'|```(?:markdown)?[\s\S]*?```[\s\S]*$'
+    r'|\n+---\s*This newsletter is generated by an AI Agent.*$',
+    re.IGNORECASE | re.DOTALL
+)
+_EXCESS_BLANK_LINES_RE = re.compile(r'\n{3,}')
 
 # --- HTML Template for the Newsletter ---
 NEWSLETTER_HTML_TEMPLATE = """
@@ -164,7 +177,7 @@ NEWSLETTER_HTML_TEMPLATE = """
 """
 
 
-def generation_agent_node(state: AgentState) -> AgentState:
+def generation_agent_node(state: AgentState) -> Dict[str, Any]:
     logger.info("---GENERATION AGENT: Starting newsletter content generation---")
     newsletter_outline: Optional[NewsletterOutline] = state.get('newsletter_outline')
     
@@ -207,7 +220,7 @@ def generation_agent_node(state: AgentState) -> AgentState:
                     {"name": s.name, "articles_count": len(s.articles)} for s in newsletter_outline.sections
                 ]
             }
-            newsletter_outline_json_for_llm = json.dumps(simple_outline_for_llm)
+            newsletter_outline_json_for_llm = orjson.dumps(simple_outline_for_llm).decode()
 
             # Define an internal prompt for the LLM that strictly asks for the intro, conclusion, and trends
             internal_llm_prompt = ChatPromptTemplate.from_messages([
@@ -229,38 +242,24 @@ def generation_agent_node(state: AgentState) -> AgentState:
                 )
             ])
             
-            llm_response_for_text = generation_llm.invoke(
-                internal_llm_prompt.format_messages(
-                    newsletter_outline_json_for_llm=newsletter_outline_json_for_llm
-                )
-            )
-            
-            # Safely extract content from LLM response (handle both BaseMessage and str)
-            # This uses hasattr to check for .content, otherwise assumes it's a string.
-            llm_generated_text_raw = llm_response_for_text.content if hasattr(llm_response_for_text, 'content') else str(llm_response_for_text)
-            
-            logger.debug(f"Raw LLM response for intro/conclusion/trends: {llm_generated_text_raw[:1000]}...")
-
-            # Use the robust clean_json_string for parsing LLM's response for intro/conclusion/trends
+            # Streamed: reading stops as soon as the JSON object is complete. JSON mode (Ollama) yields a bare object that
+            # parses directly; providers without it fall back to cleaning (clean_json_string).
             parsed_intro_conc_trends = {}
             try:
-                cleaned_intro_conc_trends_json_str = clean_json_string(llm_generated_text_raw)
-                parsed_intro_conc_trends = json.loads(cleaned_intro_conc_trends_json_str)
-            except json.JSONDecodeError as e:
-                logger.error(f"GENERATION AGENT: Failed to parse LLM's intro/conclusion/trends JSON: {e}. Raw: {llm_generated_text_raw[:500]}...")
+                parsed_intro_conc_trends = invoke_json(
+                    generation_llm,
+                    internal_llm_prompt.format_messages(
+                        newsletter_outline_json_for_llm=newsletter_outline_json_for_llm
+                    )
+                )
+            except ValueError as e: # No JSON object could be recovered from the response
+                logger.error(f"GENERATION AGENT: Failed to parse LLM's intro/conclusion/trends JSON: {e}")
                 # Fallback to simple strings if parsing fails
                 parsed_intro_conc_trends = {
                     "introduction": "This week's digest highlights important developments in AI agent technology.",
                     "conclusion": "We anticipate further advancements in this field. Stay updated for more breakthroughs.",
                     "overall_trends": ["- No specific new trends identified this week."]
                 }
-            except Exception as e:
-                logger.error(f"GENERATION AGENT: Unexpected error during parsing LLM's intro/conclusion/trends: {e}", exc_info=True)
-                parsed_intro_conc_trends = {
-                    "introduction": "This week's digest highlights important developments in AI agent technology.",
-                    "conclusion": "We anticipate further advancements in this field. Stay updated for more breakthroughs.",
-                    "overall_trends": ["- No specific new trends identified this week."]
-                }
 
             # Extract the content, ensuring it's a string for paragraphs or a list of strings for trends
             parsed_intro_content = parsed_intro_conc_trends.get('introduction', "This week's digest highlights important developments in AI agent technology.")
@@ -296,9 +295,9 @@ def generation_agent_node(state: AgentState) -> AgentState:
                 final_markdown_parts.append(f"## {section.name}") # Section Heading
                 for article in section.articles:
                     # Clean article title aggressively BEFORE using it
-                    clean_article_title = article.title.strip().strip(',').strip('\'').strip('"') # Remove trailing commas/quotes
+                    clean_article_title = article.title.strip(_TITLE_STRIP_CHARS) # Remove surrounding whitespace, commas and quotes
                     # Remove any "Read More" that might have been part of the title
-                    clean_article_title = re.sub(r'\s*\[?Read More\]?\(#?\)\s*$', '', clean_article_title, flags=re.IGNORECASE).strip() 
+                    clean_article_title = _TITLE_READ_MORE_RE.sub('', clean_article_title).strip() 
                     
                     final_markdown_parts.append(f"### {clean_article_title}") # Article title
                     final_markdown_parts.append(f"- Summary: {article.summary.strip()}") # Summary with prefix
@@ -325,15 +324,10 @@ def generation_agent_node(state: AgentState) -> AgentState:
 
 
     # --- Final Markdown Cleaning (for any remaining LLM residue or excess newlines) ---
-    content_markdown = re.sub(r'^(Here is the generated weekly AI Agent Development Newsletter content:[\n\s]*)*', '', content_markdown, flags=re.IGNORECASE | re.DOTALL).strip()
-    content_markdown = re.sub(r'```(?:markdown)?[\s\S]*?```[\s\S]*$', '', content_markdown, flags=re.DOTALL).strip() # Remove any trailing ``` LLM might output
-    content_markdown = re.sub(r'\n{3,}', '\n\n', content_markdown).strip() # Reduce excessive blank lines
-    
-    # Append the system-controlled footer exactly once, and ensure no markdown conversion issues
-    # IMPORTANT: The HTML template already has a footer div. We should not have the markdown footer
-    # from the content_markdown, and ensure the HTML template is the ONLY source of the footer.
-    # The `---` line before the footer is also not desired.
-    content_markdown = re.sub(r'\n+---\s*This newsletter is generated by an AI Agent.*$', '', content_markdown, flags=re.DOTALL).strip() # Remove the markdown HR and footer
+    # Preamble, trailing ``` block and the markdown HR/footer go in one scan. The HTML template already has a
+    # footer div and must be the ONLY source of the footer; the `---` line before it is not desired either.
+    content_markdown = _RESIDUE_RE.sub('', content_markdown)
+    content_markdown = _EXCESS_BLANK_LINES_RE.sub('\n\n', content_markdown).strip() # Reduce excessive blank lines
 
     # --- Convert Markdown to HTML body ---
     html_content_body = markdown.markdown(content_markdown)
@@ -345,7 +339,8 @@ def generation_agent_node(state: AgentState) -> AgentState:
         content_html_body=html_content_body # Pass the HTML string converted from markdown
     )
 
-    newsletter_draft = Newsletter(
+    # All fields are built here from plain strings/ints, so the draft is assembled without re-validation
+    newsletter_draft = Newsletter.model_construct(
         date=datetime.now(),
         subject=generated_subject,
         content_markdown=content_markdown,
@@ -353,11 +348,11 @@ def generation_agent_node(state: AgentState) -> AgentState:
         is_approved=False, # Editorial agent will set this
         revision_attempts=state.get('revision_attempts', 0)
     )
+    save_response_cache()
     logger.info("---GENERATION AGENT: Successfully generated newsletter draft.---")
 
-    new_state = state.copy()
-    new_state['newsletter_draft'] = newsletter_draft
-    return new_state
+    # Return only the updated channel; LangGraph merges it into the shared state.
+    return {'newsletter_draft': newsletter_draft}
 
 
 # Example usage (for testing purposes) - This block is where DATA_DIR and other utils are needed
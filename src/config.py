@@ -15,6 +15,13 @@ class Settings(BaseSettings):
     OLLAMA_MODEL_NAME: str = "llama3" # e.g., "llama3", "mistral"
     HF_API_TOKEN: Optional[str] = None # For HuggingFaceHub
     HF_MODEL_NAME: Optional[str] = None # e.g., "google/flan-t5-xxl"
+    OLLAMA_EMBEDDING_MODEL_NAME: str = "nomic-embed-text" # Used for semantic caching
+    HF_EMBEDDING_MODEL_NAME: str = "sentence-transformers/all-MiniLM-L6-v2" # Used for semantic caching
+    LLM_MAX_CONCURRENCY: int = 4 # Max in-flight LLM requests per agent; keep within provider rate limits
+    LLM_TEMPERATURE: Optional[float] = None # None keeps the model's default; 0 makes responses deterministic (and cacheable)
+    LLM_RESPONSE_CACHE_ENABLED: bool = True # Reuse JSON responses for identical prompts across runs (only when LLM_TEMPERATURE is 0)
+    LLM_STREAM_JSON_RESPONSES: bool = True # Stream JSON responses and stop reading once the JSON object is complete
+    LLM_STREAM_MAX_PREAMBLE_CHARS: int = 2000 # Cancel a streamed JSON response if no '{' has appeared after this many characters
 
     # API Keys
     SERPER_API_KEY: Optional[str] = None
@@ -29,16 +36,38 @@ class Settings(BaseSettings):
     # Renamed from EXTRACTION_MAX_SUMMARY_LENGTH to MAX_SUMMARY_LENGTH as seen in error
     MAX_SUMMARY_LENGTH: int = 500
     # Added MAX_ARTICLE_CHUNK_SIZE
-    MAX_ARTICLE_CHUNK_SIZE: int = 4000 # Typical chunk size for LLM context window, adjust as needed
+    MAX_ARTICLE_CHUNK_SIZE: int = 4000 # Token budget for an article's content in the extraction prompt (~4 chars/token); longer content is cut
+    EXTRACTION_BATCH_SIZE: int = 5 # Max articles extracted per LLM call; 1 extracts each article individually
+    EXTRACTION_BATCH_MAX_PROMPT_CHARS: int = 12000 # Max serialized article characters per batch prompt (~3k tokens)
+    EXTRACTION_EXECUTOR: str = "async" # "async" (asyncio.gather) or "threads" (ThreadPoolExecutor over the sync LLM client)
+    EXTRACTION_CACHE_ENABLED: bool = True # Reuse summaries for articles already extracted in previous runs
+    EXTRACTION_SEMANTIC_CACHE_ENABLED: bool = False # Also reuse summaries for near-identical articles (requires an embedding model)
+    EXTRACTION_SEMANTIC_CACHE_THRESHOLD: float = 0.95 # Minimum cosine similarity for a semantic cache hit
+
+    # Curation Agent Settings
+    CURATION_SCORING_MODE: str = "llm" # "llm" or "embedding" (category centroids + relevance anchors, no LLM calls)
+    CURATION_EMBEDDING_RELEVANCE_FLOOR: float = 0.3 # Anchor similarity mapped to a 0.0 relevance score (embedding mode)
+    CURATION_EMBEDDING_RELEVANCE_CEILING: float = 0.7 # Anchor similarity mapped to a 1.0 relevance score (embedding mode)
+    CURATION_BATCH_SIZE: int = 25 # Max articles scored per LLM call; 1 scores each article individually
+    CURATION_BATCH_MAX_PROMPT_CHARS: int = 12000 # Max serialized article characters per batch prompt (~3k tokens)
+    CURATION_SCORING_EXECUTOR: str = "async" # "async" (asyncio.gather) or "threads" (ThreadPoolExecutor over the sync LLM client)
+    SCORING_CACHE_ENABLED: bool = True # Reuse scores for articles already scored in previous runs
+    SCORING_SEMANTIC_CACHE_ENABLED: bool = False # Also reuse scores for near-identical articles (requires an embedding model)
+    SCORING_SEMANTIC_CACHE_THRESHOLD: float = 0.95 # Minimum cosine similarity for a semantic cache hit
+    CURATION_OUTLINE_VIA_LLM: bool = False # Let the LLM build the whole outline; otherwise sections are grouped by category in Python
+    CURATION_OUTLINE_LLM_THRESHOLD: int = 3 # With this many selected articles or fewer, the outline is built without any LLM call
 
     # Editorial Agent Settings
     EDITORIAL_MIN_QUALITY_SCORE: float = 0.75
     EDITORIAL_MAX_REVISION_ATTEMPTS: int = 2
+    EDITORIAL_DETERMINISTIC_PRECHECK: bool = True # Reject a clearly broken first draft without the LLM (approval always comes from the LLM judge)
 
     # Newsletter Delivery Settings
     NEWSLETTER_SENDER_EMAIL: str = "your_sender_email@example.com"
     NEWSLETTER_RECIPIENTS: str = "your_recipient_email@example.com" # Comma-separated
     NEWSLETTER_SUBJECT_PREFIX: str = "AI Agent Weekly Digest:"
+    DELIVERY_MAX_INLINE_HTML_CHARS: int = 512_000 # Larger HTML is sent without CSS inlining (bounds worst-case inliner time)
+    DELIVERY_MAX_STYLE_BLOCKS: int = 2 # More <style> blocks than this also skips CSS inlining
 
     def get_research_keywords_list(self) -> List[str]:
         return [k.strip() for k in self.RESEARCH_KEYWORDS.split(',') if k.strip()]
@@ -1,21 +1,37 @@
+import asyncio
 from langgraph.graph import StateGraph, END
+from langchain_core.runnables import RunnableLambda
 from datetime import datetime
 from typing import Optional
+try:
+    import uvloop # libuv-based event loop for the async nodes (not available on Windows)
+except ImportError:
+    uvloop = None
 from src.models.newsletter_models import Newsletter
 
 from src.config import get_settings
 from src.utils import logger
 from src.state import AgentState
 from src.agents.research import research_agent_node
-from src.agents.extraction import extraction_agent_node
-from src.agents.curation import curation_agent_node
+from src.agents.extraction import extraction_agent_node, extraction_agent_node_async
+from src.agents.curation import curation_agent_node, curation_agent_node_async
 from src.agents.generation import generation_agent_node
 from src.agents.editorial import editorial_agent_node
-from src.agents.delivery import delivery_agent_node
+from src.agents.delivery import delivery_agent_node, delivery_agent_node_async
 
 # Load application settings
 settings = get_settings()
 
+def install_event_loop_policy():
+    """
+    Makes every event loop created from here on (asyncio.run in the async agent nodes) a uvloop loop, when uvloop is
+    installed. Uses the event loop policy rather than uvloop.install(), which is deprecated as of Python 3.12.
+    Called by both entry points (the CLI below and the Streamlit app).
+    """
+    if uvloop is not None and not isinstance(asyncio.get_event_loop_policy(), uvloop.EventLoopPolicy):
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+        logger.info("ORCHESTRATOR: Using uvloop event loop.")
+
 # --- Define the graph ---
 def create_newsletter_workflow():
     """
@@ -25,11 +41,11 @@ def create_newsletter_workflow():
 
     # 1. Add Nodes for each Agent
     workflow.add_node("research", research_agent_node)
-    workflow.add_node("extraction", extraction_agent_node)
-    workflow.add_node("curation", curation_agent_node)
+    workflow.add_node("extraction", RunnableLambda(extraction_agent_node, afunc=extraction_agent_node_async)) # Sync for stream(), async for astream()
+    workflow.add_node("curation", RunnableLambda(curation_agent_node, afunc=curation_agent_node_async)) # Sync for stream(), async for astream()
     workflow.add_node("generation", generation_agent_node)
     workflow.add_node("editorial", editorial_agent_node)
-    workflow.add_node("delivery", delivery_agent_node)
+    workflow.add_node("delivery", RunnableLambda(delivery_agent_node, afunc=delivery_agent_node_async)) # Sync for stream(), async for astream()
 
     # 2. Set Entry Point: Always start with research for the full pipeline
     workflow.set_entry_point("research")
@@ -73,6 +89,8 @@ def create_newsletter_workflow():
 # --- Main execution logic ---
 if __name__ == "__main__":
     logger.info("--- Starting AI Agent News Agent Workflow ---")
+
+    install_event_loop_policy()
     
     # Create the workflow graph (will start from research as default)
     app = create_newsletter_workflow()
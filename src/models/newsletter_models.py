@@ -1,5 +1,5 @@
-from pydantic import BaseModel, Field
-from typing import List, Optional
+from pydantic import BaseModel, Field, ValidationInfo, field_validator
+from typing import Any, List, Optional
 from datetime import datetime
 
 class NewsletterArticle(BaseModel):
@@ -28,6 +28,14 @@ class NewsletterOutline(BaseModel):
     conclusion_points: List[str] = Field(default_factory=list, description="Key points for the newsletter conclusion.")
     overall_trends: List[str] = Field(default_factory=list, description="Overarching trends identified for the week.")
 
+class OutlinePoints(BaseModel):
+    """
+    Structured LLM output for the narrative parts of the outline (sections are built by the Curation Agent).
+    """
+    introduction_points: List[str] = Field(default_factory=list, description="Key points for the newsletter introduction.")
+    conclusion_points: List[str] = Field(default_factory=list, description="Key points for the newsletter conclusion.")
+    overall_trends: List[str] = Field(default_factory=list, description="Overarching trends identified for the week.")
+
 class Newsletter(BaseModel):
     """
     Represents the complete, generated newsletter content.
@@ -36,8 +44,46 @@ class Newsletter(BaseModel):
     subject: str = Field(..., description="Subject line for the email.")
     content_markdown: str = Field(..., description="Full newsletter content in Markdown format.")
     content_html: Optional[str] = Field(None, description="Full newsletter content in HTML format, derived from markdown.") # <--- CHANGED BACK TO Optional[str] = Field(None, ...)
+    content_text: Optional[str] = Field(None, description="Plain-text rendering of content_html, derived by the Delivery Agent.")
     is_approved: bool = Field(False, description="Whether the newsletter has been approved by the Editorial Agent.")
     approval_score: Optional[float] = Field(None, description="Quality score from the Editorial Agent.")
     feedback: Optional[str] = Field(None, description="Feedback from the Editorial Agent if not approved.")
     revision_attempts: int = Field(0, description="Number of times the newsletter has been revised.")
-    sent_timestamp: Optional[datetime] = Field(None, description="Timestamp when the newsletter was sent.")
\ No newline at end of file
+    sent_timestamp: Optional[datetime] = Field(None, description="Timestamp when the newsletter was sent.")
+
+class EditorialIssue(BaseModel):
+    """
+    A single issue reported by the Editorial Agent's review.
+    """
+    type: str = Field("Unknown Type", description="Rubric criterion the issue relates to (e.g., 'Factual Accuracy').")
+    description: str = Field("No description", description="Specific issue details.")
+
+    @field_validator('type', 'description', mode='before')
+    @classmethod
+    def _default_if_null(cls, value: Any, info: ValidationInfo) -> Any:
+        # An explicit null from the LLM gets the field default, as a missing key would
+        return cls.model_fields[info.field_name].default if value is None else value
+
+class EditorialReview(BaseModel):
+    """
+    Structured LLM output for the Editorial Agent's review of a newsletter draft.
+    """
+    quality_score: float = Field(0.0, description="Overall quality score from 0.0 to 1.0.")
+    feedback: str = Field("No specific feedback provided.", description="Detailed feedback, or 'Approved'.")
+    issues_found: List[EditorialIssue] = Field(default_factory=list, description="Specific issues found in the draft.")
+
+    @field_validator('quality_score', 'feedback', mode='before')
+    @classmethod
+    def _default_if_null(cls, value: Any, info: ValidationInfo) -> Any:
+        # An explicit null from the LLM gets the field default, as a missing key would
+        return cls.model_fields[info.field_name].default if value is None else value
+
+    @field_validator('issues_found', mode='before')
+    @classmethod
+    def _coerce_issue_list(cls, value: Any) -> List[Any]:
+        # LLMs sometimes return null, a single issue, or plain strings instead of issue objects
+        if value is None:
+            return []
+        if isinstance(value, (str, dict)):
+            value = [value]
+        return [EditorialIssue(description=item) if isinstance(item, str) else item for item in value if item is not None]
@@ -1,7 +1,10 @@
-from pydantic import BaseModel, Field
-from typing import List, Optional
+from pydantic import BaseModel, Field, field_validator
+from typing import Any, List, Optional
 from datetime import datetime
 
+# Whitespace plus stray list separators, stripped from both ends of entity/trend items in one pass
+_ITEM_STRIP_CHARS = " \t\n\r,"
+
 class RawArticle(BaseModel):
     """
     Represents a raw article fetched by the Research Agent.
@@ -12,6 +15,9 @@ class RawArticle(BaseModel):
     source: str = Field(..., description="Source (e.g., 'web_search', 'rss_feed', 'arxiv').")
     fetch_timestamp: datetime = Field(default_factory=datetime.now, description="Timestamp when the article was fetched.")
 
+# Start of the placeholder summary given to articles that could not be processed by the Extraction Agent
+FALLBACK_SUMMARY_PREFIX = "Could not process article due to an error."
+
 class SummarizedContent(BaseModel):
     """
     Represents content after extraction and summarization by the Extraction Agent.
@@ -22,4 +28,58 @@ class SummarizedContent(BaseModel):
     key_entities: List[str] = Field(default_factory=list, description="List of key entities mentioned (e.g., agent names, frameworks).")
     trends_identified: List[str] = Field(default_factory=list, description="List of overarching trends identified.")
     relevance_score: Optional[float] = Field(None, description="Relevance score assigned by Curation Agent (0.0 to 1.0).")
-    category: Optional[str] = Field(None, description="Assigned category for the newsletter section.")
\ No newline at end of file
+    category: Optional[str] = Field(None, description="Assigned category for the newsletter section.")
+
+class ArticleExtraction(BaseModel):
+    """
+    Structured LLM output for extracting a single article in the Extraction Agent.
+    """
+    summary: str = Field("No summary generated.", description="Concise summary of the article.")
+    key_entities: List[str] = Field(default_factory=list, description="List of key entities mentioned.")
+    trends_identified: List[str] = Field(default_factory=list, description="List of emerging trends identified.")
+
+    @field_validator('summary', mode='after')
+    @classmethod
+    def _strip_summary(cls, value: str) -> str:
+        return value.strip()
+
+    @field_validator('key_entities', 'trends_identified', mode='before')
+    @classmethod
+    def _coerce_string_list(cls, value: Any) -> List[str]:
+        # LLMs sometimes return a comma-separated string instead of an array; non-string items are dropped
+        if value is None:
+            return []
+        if isinstance(value, str):
+            value = value.split(',')
+        return [stripped for item in value if isinstance(item, str) and (stripped := item.strip(_ITEM_STRIP_CHARS))]
+
+class BatchArticleExtraction(ArticleExtraction):
+    """
+    A single entry of a batched extraction response, matched back to its article by id.
+    """
+    id: int = Field(..., description="Index of the article within the extracted batch.")
+
+class ArticleExtractionBatch(BaseModel):
+    """
+    Structured LLM output for extracting a batch of articles in a single call.
+    """
+    extractions: List[BatchArticleExtraction] = Field(default_factory=list, description="One extraction entry per article in the batch.")
+
+class ArticleScore(BaseModel):
+    """
+    Structured LLM output for scoring a single article in the Curation Agent.
+    """
+    relevance_score: float = Field(..., description="Relevance score from 0.0 (not relevant) to 1.0 (highly relevant).")
+    category: str = Field(..., description="Newsletter category assigned to the article.")
+
+class BatchArticleScore(ArticleScore):
+    """
+    A single entry of a batched scoring response, matched back to its article by id.
+    """
+    id: int = Field(..., description="Index of the article within the scored batch.")
+
+class ArticleScoreBatch(BaseModel):
+    """
+    Structured LLM output for scoring a batch of articles in a single call.
+    """
+    scores: List[BatchArticleScore] = Field(default_factory=list, description="One score entry per article in the batch.")
@@ -12,7 +12,33 @@ NEWSLETTER_CATEGORIES = [
     "Miscellaneous"
 ]
 
-# Prompt for scoring relevance and assigning category
+# Category descriptions, embedded as category centroids when CURATION_SCORING_MODE is "embedding"
+NEWSLETTER_CATEGORY_DESCRIPTIONS = {
+    "Top Insights & Breakthroughs": "Major breakthroughs, state-of-the-art results and landmark announcements in AI agents.",
+    "New Frameworks & Tools": "Releases and updates of agent frameworks, libraries, SDKs and developer tools such as LangChain, LangGraph, CrewAI and AutoGen.",
+    "Agentic Workflow Spotlights": "Case studies and designs of agentic workflows, tool use, planning, memory and multi-agent orchestration.",
+    "Ethical & Societal Impact": "Safety, ethics, regulation, fairness and the societal impact of autonomous AI systems.",
+    "Research & Academic Highlights": "Academic papers, arXiv preprints, benchmarks and research findings on agents and LLMs.",
+    "Tutorials & Learning Resources": "How-to guides, tutorials, courses and hands-on walkthroughs for building AI agents.",
+    "Industry News & Applications": "Company news, funding, products and real-world deployments of AI agents in industry.",
+    "Miscellaneous": "General technology news not specifically about AI agents."
+}
+
+# Reference texts describing a highly relevant article; relevance is similarity to the closest anchor ("embedding" mode)
+CURATION_RELEVANCE_ANCHORS = [
+    "A new framework or tool for building autonomous AI agents and multi-agent systems.",
+    "Research on LLM-based agents: planning, tool use, memory and agentic workflows.",
+    "A practical guide to developing, orchestrating and deploying AI agents with LangChain, LangGraph, CrewAI or AutoGen.",
+    "Safety, evaluation and societal impact of autonomous AI agents."
+]
+
+# Categories rendered once at import; bound into the prompts below via .partial()
+NEWSLETTER_CATEGORIES_STR = ", ".join(NEWSLETTER_CATEGORIES)
+
+# Prompt for scoring relevance and assigning category.
+# Everything static (instructions, categories, output format) is in the system message so the rendered prompt
+# starts with a byte-identical prefix on every call (reusable by provider-side prompt/KV caching);
+# only the per-article fields follow.
 CURATION_SCORING_PROMPT = ChatPromptTemplate.from_messages(
     [
         (
@@ -22,7 +48,13 @@ CURATION_SCORING_PROMPT = ChatPromptTemplate.from_messages(
             "and agentic workflows. Assign a relevance score from 0.0 (not relevant) to 1.0 (highly relevant). "
             "Also, assign it to the most appropriate newsletter category from the provided list. "
             "Prioritize content that is novel, impactful, or highly practical for AI agent developers. "
-            "If the article is not clearly relevant, assign a low score (e.g., 0.2 or less)."
+            "If the article is not clearly relevant, assign a low score (e.g., 0.2 or less).\n\n"
+            "Available Categories: {categories}\n\n"
+            "Format your response as a JSON object with the following keys: 'relevance_score' (float), 'category' (string)."
+            "Example:\n"
+            "```json\n"
+            "{{ \"relevance_score\": 0.85, \"category\": \"New Frameworks & Tools\" }}\n"
+            "```"
         ),
         (
             "human",
@@ -30,16 +62,39 @@ CURATION_SCORING_PROMPT = ChatPromptTemplate.from_messages(
             "Title: {title}\n"
             "Summary: {summary}\n"
             "Key Entities: {key_entities}\n"
-            "Trends Identified: {trends_identified}\n\n"
+            "Trends Identified: {trends_identified}"
+        ),
+    ]
+).partial(categories=NEWSLETTER_CATEGORIES_STR)
+
+# Prompt for scoring and categorizing a batch of articles in a single LLM call (static prefix first, as above)
+CURATION_SCORING_BATCH_PROMPT = ChatPromptTemplate.from_messages(
+    [
+        (
+            "system",
+            "You are an expert AI agent development editor. Your task is to evaluate a batch of summarized articles "
+            "for their relevance to a weekly newsletter on AI agent development, multi-agent systems, "
+            "and agentic workflows. Assign each article a relevance score from 0.0 (not relevant) to 1.0 (highly relevant). "
+            "Also, assign each article to the most appropriate newsletter category from the provided list. "
+            "Prioritize content that is novel, impactful, or highly practical for AI agent developers. "
+            "If an article is not clearly relevant, assign a low score (e.g., 0.2 or less). "
+            "Score every article independently and include every provided 'id' exactly once.\n\n"
             "Available Categories: {categories}\n\n"
-            "Format your response as a JSON object with the following keys: 'relevance_score' (float), 'category' (string)."
+            "Format your response as a JSON object with a single key 'scores' holding an array with one object per article, "
+            "each with the keys: 'id' (integer, copied from the input), 'relevance_score' (float), 'category' (string)."
             "Example:\n"
             "```json\n"
-            "{{ \"relevance_score\": 0.85, \"category\": \"New Frameworks & Tools\" }}\n"
+            "{{ \"scores\": [{{ \"id\": 0, \"relevance_score\": 0.85, \"category\": \"New Frameworks & Tools\" }}, "
+            "{{ \"id\": 1, \"relevance_score\": 0.1, \"category\": \"Miscellaneous\" }}] }}\n"
             "```"
         ),
+        (
+            "human",
+            "Evaluate the following summarized articles (JSON array, each with an 'id'):\n\n"
+            "{articles_json}"
+        ),
     ]
-)
+).partial(categories=NEWSLETTER_CATEGORIES_STR)
 
 # Prompt for structuring the newsletter outline (REFINEMENT for POPULATION & CONTENT)
 CURATION_OUTLINE_PROMPT = ChatPromptTemplate.from_messages(
@@ -96,4 +151,29 @@ CURATION_OUTLINE_PROMPT = ChatPromptTemplate.from_messages(
             "**Crucial: Only include each selected article ONCE in its MOST relevant section. AVOID DUPLICATES.**"
         ),
     ]
-)
\ No newline at end of file
+).partial(categories=NEWSLETTER_CATEGORIES_STR)
+
+# Prompt for the outline's introduction/conclusion/trend points only (sections are grouped by category in Python)
+CURATION_OUTLINE_POINTS_PROMPT = ChatPromptTemplate.from_messages(
+    [
+        (
+            "system",
+            "You are an expert newsletter editor specializing in AI agent development. "
+            "Given the titles and categories of the articles selected for this week's newsletter, "
+            "write the introduction points, conclusion points, and overall trends for the issue. "
+            "All points MUST be informed by the actual article topics provided. Do NOT fabricate or reuse unrelated/generic points."
+        ),
+        (
+            "human",
+            "Selected articles (one per line, as '[Category] Title'):\n\n"
+            "{articles_digest}\n\n"
+            "Format your response as a JSON object with the following keys: "
+            "'introduction_points' (max 3 concise strings), 'conclusion_points' (max 2 concise strings), "
+            "'overall_trends' (2-3 short strings)."
+            "Example:\n"
+            "```json\n"
+            "{{ \"introduction_points\": [\"...\"], \"conclusion_points\": [\"...\"], \"overall_trends\": [\"...\", \"...\"] }}\n"
+            "```"
+        ),
+    ]
+)
@@ -49,6 +49,9 @@ Provide a JSON object with the following structure:
 """
 
 #The main prompt for the Editorial Agent to review the newsletter draft
+# Message order is deliberate: the static instructions and the reference articles (unchanged across the revision
+# loop of a run) form a stable prefix, and the draft (different on every review) comes last, so the provider's
+# prompt/KV cache can reuse the prefix on revision reviews.
 EDITORIAL_REVIEW_PROMPT = ChatPromptTemplate.from_messages(
 [
     (
@@ -61,6 +64,13 @@ EDITORIAL_REVIEW_PROMPT = ChatPromptTemplate.from_messages(
         # EDITORIAL_RUBRIC already contains the doubled braces, so it's safe to inject.
         f"\n\nHere is the rubric and instructions for your evaluation:\n\n\n{EDITORIAL_RUBRIC}\n\n\n"
     ),
+    (
+        "human",
+        "Here are the summarized original articles for factual verification (JSON format). You MUST use this information to verify factual accuracy:\n\n"
+        "```json\n" # <-- This ` is crucial for the JSON block
+        "{summarized_articles_json}\n"
+        "```" # <-- This ` is crucial for closing the JSON block
+    ),
     (
         "human",
         "Please review the following newsletter draft. Focus on applying the rubric strictly:\n\n"
@@ -69,11 +79,6 @@ EDITORIAL_REVIEW_PROMPT = ChatPromptTemplate.from_messages(
         "{content_markdown}\n"
         "```\n\n" # <-- This ` is crucial for closing the markdown block
 
-        "Here are the summarized original articles for factual verification (JSON format). You MUST use this information to verify factual accuracy:\n\n"
-        "```json\n" # <-- This ` is crucial for the JSON block
-        "{summarized_articles_json}\n"
-        "```\n\n" # <-- This ` is crucial for closing the JSON block
-
         "**Based on the rubric, critically evaluate the newsletter draft. Provide ONLY the JSON output, and ensure the 'feedback' field accurately reflects the 'is_approved' status.**"
     ),
 ]
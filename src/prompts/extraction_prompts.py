@@ -1,6 +1,8 @@
 from langchain_core.prompts import ChatPromptTemplate
 
-# Prompt for general summarization and key entity extraction
+# Prompt for general summarization and key entity extraction.
+# Static instructions and the output format come first and the per-article fields last, so consecutive calls share
+# an identical prompt prefix that the model server can reuse (e.g., Ollama's prompt cache, provider prefix caching).
 EXTRACTION_PROMPT = ChatPromptTemplate.from_messages(
     [
         (
@@ -16,30 +18,44 @@ EXTRACTION_PROMPT = ChatPromptTemplate.from_messages(
             "1. A concise summary (aim for 2-4 sentences, max {max_summary_length} characters) focusing on AI agent relevance.\n"
             "2. A **JSON array of strings** for key entities (e.g., [\"LangGraph\", \"CrewAI\"]).\n" # <--- KEY CHANGE: Emphasize JSON array
             "3. A **JSON array of strings** for any emerging trends or significant implications for the AI agent development field (e.g., [\"autonomous research\", \"ethical AI\"]).\n\n" # <--- KEY CHANGE: Emphasize JSON array
-            "Article Title: {title}\n"
-            "Article URL: {url}\n"
-            "Article Content:\n{content}\n\n"
             "Format your response as a JSON object with the following keys, ensuring **all keys and string values are enclosed in double quotes**: 'summary', 'key_entities', 'trends_identified'.\n"
             "Example:\n"
             "```json\n"
             "{{ \"summary\": \"This is a summary focusing on AI agent relevance, aiming for two to four sentences.\", \"key_entities\": [\"LangGraph\", \"CrewAI\"], \"trends_identified\": [\"autonomous research\"] }}\n"
-            "```"
+            "```\n\n"
+            # Cacheable prefix ends here: everything above is identical for every article in a run
+            "Article Title: {title}\n"
+            "Article URL: {url}\n"
+            "Article Content:\n{content}"
         ),
     ]
 )
 
-# Prompt for re-summarization if initial summary is too long (good for robustness)
-RESUMMARIZE_PROMPT = ChatPromptTemplate.from_messages(
+# Prompt for extracting a batch of articles in a single LLM call (same output per article as EXTRACTION_PROMPT)
+EXTRACTION_BATCH_PROMPT = ChatPromptTemplate.from_messages(
     [
         (
             "system",
-            "You are an expert summarizer. Your task is to shorten the given text "
-            "to a maximum of {max_summary_length} characters while retaining its core meaning "
-            "and relevance to AI agent development.",
+            "You are an expert AI agent development researcher. Your task is to analyze a batch of raw articles "
+            "and extract the most important information related to AI agent development, multi-agent systems, "
+            "and agentic workflows. Focus on new frameworks, research breakthroughs, significant applications, "
+            "and emerging concepts. Analyze every article independently and include every provided 'id' exactly once."
         ),
         (
             "human",
-            "Shorten the following text:\n\n{text}"
+            "For each article below (JSON array, each with an 'id'), provide:\n\n"
+            "1. A concise summary (aim for 2-4 sentences, max {max_summary_length} characters) focusing on AI agent relevance.\n"
+            "2. A **JSON array of strings** for key entities (e.g., [\"LangGraph\", \"CrewAI\"]).\n"
+            "3. A **JSON array of strings** for any emerging trends or significant implications for the AI agent development field (e.g., [\"autonomous research\", \"ethical AI\"]).\n\n"
+            "Format your response as a JSON object with a single key 'extractions' holding an array with one object per article, "
+            "each with the keys: 'id' (integer, copied from the input), 'summary', 'key_entities', 'trends_identified'. "
+            "Ensure **all keys and string values are enclosed in double quotes**.\n"
+            "Example:\n"
+            "```json\n"
+            "{{ \"extractions\": [{{ \"id\": 0, \"summary\": \"This is a summary focusing on AI agent relevance.\", \"key_entities\": [\"LangGraph\"], \"trends_identified\": [\"autonomous research\"] }}] }}\n"
+            "```\n\n"
+            # Cacheable prefix ends here: everything above is identical for every batch in a run
+            "Articles:\n{articles_json}"
         ),
     ]
-)
\ No newline at end of file
+)
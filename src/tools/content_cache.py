@@ -0,0 +1,112 @@
+import os
+import hashlib
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import orjson # Fast (de)serialization of entries, including the embedding vectors
+
+from src.utils import logger, CACHE_DIR
+
+class ContentCache:
+    """
+    A persistent two-tier cache for LLM-derived results, keyed by article content.
+    - Exact tier: a sha256 digest of the key parts maps directly to the cached value.
+    - Semantic tier: each entry may carry an embedding vector; a lookup vector whose cosine
+      similarity to a cached vector meets `semantic_threshold` reuses that entry's value.
+    Entries are stored as JSON under CACHE_DIR/<name>.json.
+    """
+    def __init__(self, name: str, semantic_threshold: float = 0.95):
+        self.path = CACHE_DIR / f"{name}.json"
+        self.semantic_threshold = semantic_threshold
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._matrix: Optional[np.ndarray] = None # Normalized embedding matrix, rebuilt lazily
+        self._matrix_keys: List[str] = []
+        self._dirty = False
+        self._load()
+        logger.info(f"ContentCache '{name}' initialized with {len(self._entries)} entries from {self.path}")
+
+    @staticmethod
+    def make_key(*parts: str) -> str:
+        """
+        Builds an exact-match cache key from the given string parts.
+        """
+        return hashlib.sha256("||".join(parts).encode('utf-8')).hexdigest()
+
+    def _load(self):
+        try:
+            with open(self.path, 'rb') as f:
+                self._entries = orjson.loads(f.read())
+        except FileNotFoundError:
+            self._entries = {}
+        except Exception as e:
+            logger.warning(f"ContentCache: Failed to load {self.path}, starting empty: {e}")
+            self._entries = {}
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Returns the cached value for an exact key, or None on a miss.
+        """
+        entry = self._entries.get(key)
+        return entry['value'] if entry else None
+
+    def get_similar(self, vector: List[float]) -> Optional[Dict[str, Any]]:
+        """
+        Returns the value of the most similar cached entry if its cosine similarity
+        meets the semantic threshold, or None otherwise.
+        """
+        if self._matrix is None:
+            self._build_matrix()
+        if self._matrix is None or not len(self._matrix_keys):
+            return None
+        query = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm == 0.0 or query.shape[0] != self._matrix.shape[1]:
+            return None
+        similarities = self._matrix @ (query / norm)
+        best = int(np.argmax(similarities))
+        if similarities[best] >= self.semantic_threshold:
+            logger.debug(f"ContentCache: Semantic hit with similarity {similarities[best]:.3f}.")
+            return self._entries[self._matrix_keys[best]]['value']
+        return None
+
+    def _build_matrix(self):
+        keys = [k for k, e in self._entries.items() if e.get('vector')]
+        if not keys:
+            self._matrix, self._matrix_keys = None, []
+            return
+        try:
+            matrix = np.asarray([self._entries[k]['vector'] for k in keys], dtype=np.float32)
+        except ValueError:
+            # Vectors of mixed dimensions (e.g., the embedding model was changed); keep the latest dimension only.
+            dim = len(self._entries[keys[-1]]['vector'])
+            keys = [k for k in keys if len(self._entries[k]['vector']) == dim]
+            matrix = np.asarray([self._entries[k]['vector'] for k in keys], dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0.0] = 1.0
+        self._matrix, self._matrix_keys = matrix / norms, keys
+
+    def set(self, key: str, value: Dict[str, Any], vector: Optional[List[float]] = None):
+        """
+        Stores a value under an exact key, optionally with an embedding vector for semantic lookups.
+        """
+        self._entries[key] = {"value": value, "vector": list(vector) if vector is not None else None}
+        if vector is not None:
+            self._matrix = None # Invalidate; rebuilt on the next semantic lookup
+        self._dirty = True
+
+    def save(self):
+        """
+        Persists the cache to disk if it changed. Writes to a temp file and renames it into place
+        so an interrupted run never leaves a truncated cache behind.
+        """
+        if not self._dirty:
+            return
+        tmp_path = self.path.with_suffix('.json.tmp')
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(orjson.dumps(self._entries))
+            os.replace(tmp_path, self.path)
+            self._dirty = False
+            logger.info(f"ContentCache: Saved {len(self._entries)} entries to {self.path}")
+        except Exception as e:
+            logger.error(f"ContentCache: Failed to save cache to {self.path}: {e}", exc_info=True)
@@ -0,0 +1,53 @@
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from src.utils import logger
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0.0] = 1.0
+    return matrix / norms
+
+class EmbeddingScorer:
+    """
+    Scores articles for relevance and assigns a category without calling an LLM.
+    - Category: the category whose description embedding (centroid) is most similar to the article.
+    - Relevance: the highest cosine similarity to a set of "relevant article" anchor texts, linearly
+      rescaled from [relevance_floor, relevance_ceiling] to [0.0, 1.0] and clipped.
+    Reference embeddings are computed lazily on first use, so construction never touches the network.
+    """
+    def __init__(self, embeddings: Embeddings, category_descriptions: Dict[str, str], relevance_anchors: List[str],
+                 relevance_floor: float = 0.3, relevance_ceiling: float = 0.7):
+        self.embeddings = embeddings
+        self.category_descriptions = category_descriptions
+        self.categories = list(category_descriptions)
+        self.relevance_anchors = relevance_anchors
+        self.relevance_floor = relevance_floor
+        self.relevance_ceiling = relevance_ceiling
+        self._centroids: Optional[np.ndarray] = None
+        self._anchors: Optional[np.ndarray] = None
+
+    def _ensure_reference_vectors(self):
+        if self._centroids is not None:
+            return
+        category_texts = [f"{name}: {description}" for name, description in self.category_descriptions.items()]
+        self._centroids = _normalize_rows(np.asarray(self.embeddings.embed_documents(category_texts), dtype=np.float32))
+        self._anchors = _normalize_rows(np.asarray(self.embeddings.embed_documents(self.relevance_anchors), dtype=np.float32))
+        logger.info(f"EmbeddingScorer: Embedded {len(self.categories)} category centroids and {len(self.relevance_anchors)} relevance anchors.")
+
+    def score(self, vectors: List[List[float]]) -> List[Tuple[float, str]]:
+        """
+        Returns a (relevance_score, category) pair for each article embedding, in input order.
+        All articles are scored with two matrix products.
+        """
+        if not vectors:
+            return []
+        self._ensure_reference_vectors()
+        matrix = _normalize_rows(np.asarray(vectors, dtype=np.float32))
+        category_indices = np.argmax(matrix @ self._centroids.T, axis=1)
+        similarities = np.max(matrix @ self._anchors.T, axis=1)
+        span = max(self.relevance_ceiling - self.relevance_floor, 1e-6)
+        relevance_scores = np.clip((similarities - self.relevance_floor) / span, 0.0, 1.0)
+        return [(round(float(r), 4), self.categories[int(c)]) for r, c in zip(relevance_scores, category_indices)]
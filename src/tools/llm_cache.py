@@ -0,0 +1,47 @@
+import hashlib
+from typing import Any, Dict, Optional
+
+import orjson # Deep copies of cached responses via a JSON round-trip
+
+from src.tools.content_cache import ContentCache
+from src.utils import logger
+
+class LLMResponseCache:
+    """
+    Exact-match cache of parsed JSON LLM responses, keyed by a sha256 of the model identity and the full prompt.
+    Identical prompts to a deterministic (temperature 0) model return identical output, so a hit skips the
+    LLM round-trip entirely. Persisted as JSON under CACHE_DIR via ContentCache; hit/miss counts are kept per run.
+    """
+    def __init__(self, name: str = "llm_responses"):
+        self._store = ContentCache(name)
+        self.stats = {"hits": 0, "misses": 0}
+
+    @staticmethod
+    def make_key(model_identity: str, prompt: str) -> str:
+        """
+        Builds the cache key for a prompt sent to the given model.
+        """
+        return hashlib.sha256(f"{model_identity}||{prompt}".encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Returns a copy of the cached response for the key (or None), counting the hit or miss.
+        Callers may modify the returned dict without touching the cached entry.
+        """
+        value = self._store.get(key)
+        self.stats["hits" if value is not None else "misses"] += 1
+        return orjson.loads(orjson.dumps(value)) if value is not None else None
+
+    def set(self, key: str, value: Dict[str, Any]):
+        """
+        Stores a copy of the response, so later changes to the caller's dict (e.g., model objects put into it)
+        can neither break serialization on save nor leak into later hits.
+        """
+        self._store.set(key, orjson.loads(orjson.dumps(value)))
+
+    def save(self):
+        """
+        Persists new entries and logs this run's hit/miss counts.
+        """
+        self._store.save()
+        logger.info(f"LLMResponseCache: {self.stats['hits']} hits, {self.stats['misses']} misses.")
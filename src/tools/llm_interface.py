@@ -1,21 +1,33 @@
 from langchain_community.llms import Ollama
 from langchain_community.chat_models import ChatOllama
 from langchain_community.llms import HuggingFaceHub
+from langchain_community.embeddings import OllamaEmbeddings, HuggingFaceHubEmbeddings
+from langchain_core.embeddings import Embeddings
 from langchain_core.language_models.llms import BaseLLM
 from langchain_core.language_models.chat_models import BaseChatModel
+from pydantic import BaseModel
+import orjson
+from functools import lru_cache
 from src.config import get_settings
-from src.utils import logger
-from typing import Union
+from src.tools.llm_cache import LLMResponseCache
+from src.utils import logger, clean_json_string, escape_quotes_in_json_string_values, JsonObjectScanner, JsonItemScanner
+from typing import Union, Dict, Any, List, Type, TypeVar, AsyncIterator
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
 
 settings = get_settings()
 
-def get_ollama_llm() -> Ollama:
+# Exact-match cache of JSON responses; only meaningful for deterministic (temperature 0) generation
+response_cache = LLMResponseCache() if settings.LLM_RESPONSE_CACHE_ENABLED and settings.LLM_TEMPERATURE == 0 else None
+
+def get_ollama_llm(json_mode: bool = False) -> Ollama:
     """
     Initializes and returns an Ollama LLM instance based on configuration.
     Assumes Ollama server is running locally or at specified base_url.
+    With json_mode, Ollama constrains generation to a valid JSON value (format="json").
     """
     try:
-        llm = Ollama(base_url=settings.OLLAMA_BASE_URL, model=settings.OLLAMA_MODEL_NAME)
+        llm = Ollama(base_url=settings.OLLAMA_BASE_URL, model=settings.OLLAMA_MODEL_NAME, format="json" if json_mode else None, temperature=settings.LLM_TEMPERATURE)
         logger.info(f"Initialized Ollama LLM: {settings.OLLAMA_MODEL_NAME} at {settings.OLLAMA_BASE_URL}")
         # A quick ping to check if it's alive (optional, can add more robust checks)
         # llm.invoke("Hello", config={"max_tokens": 1}) # Simple invoke can check connectivity
@@ -24,12 +36,13 @@ def get_ollama_llm() -> Ollama:
         logger.error(f"Failed to initialize Ollama LLM: {e}")
         raise
 
-def get_ollama_chat_model() -> ChatOllama:
+def get_ollama_chat_model(json_mode: bool = False) -> ChatOllama:
     """
     Initializes and returns an Ollama ChatModel instance based on configuration.
+    With json_mode, Ollama constrains generation to a valid JSON value (format="json").
     """
     try:
-        chat_model = ChatOllama(base_url=settings.OLLAMA_BASE_URL, model=settings.OLLAMA_MODEL_NAME)
+        chat_model = ChatOllama(base_url=settings.OLLAMA_BASE_URL, model=settings.OLLAMA_MODEL_NAME, format="json" if json_mode else None, temperature=settings.LLM_TEMPERATURE)
         logger.info(f"Initialized Ollama Chat Model: {settings.OLLAMA_MODEL_NAME} at {settings.OLLAMA_BASE_URL}")
         return chat_model
     except Exception as e:
@@ -61,20 +74,220 @@ def get_huggingface_llm() -> HuggingFaceHub:
         logger.error(f"Failed to initialize HuggingFace LLM: {e}")
         raise
 
-def get_default_llm() -> Union[BaseLLM, BaseChatModel]:
+@lru_cache(maxsize=None)
+def get_default_llm(json_mode: bool = False) -> Union[BaseLLM, BaseChatModel]:
     """
     Returns the appropriate LLM or ChatModel instance based on the LLM_PROVIDER setting.
+    json_mode requests constrained JSON output where the provider supports it (Ollama);
+    HuggingFace has no JSON mode, so its responses are cleaned by parse_json_response instead.
+    Memoized: every agent asking for the same mode shares one client (and its HTTP connection pool). The clients
+    hold no per-call state, so the shared instance is also safe to use from worker threads (e.g., threaded scoring).
     """
     provider = settings.LLM_PROVIDER.lower()
     if provider == "ollama":
         # For chat models like Llama 3, usually ChatOllama is preferred
-        return get_ollama_chat_model() if "chat" in settings.OLLAMA_MODEL_NAME.lower() else get_ollama_llm()
+        return get_ollama_chat_model(json_mode) if "chat" in settings.OLLAMA_MODEL_NAME.lower() else get_ollama_llm(json_mode)
     elif provider == "huggingface":
         return get_huggingface_llm()
     else:
         logger.error(f"Unsupported LLM provider specified: {settings.LLM_PROVIDER}")
         raise ValueError(f"Unsupported LLM provider: {settings.LLM_PROVIDER}")
 
+@lru_cache(maxsize=None)
+def get_default_embeddings() -> Embeddings:
+    """
+    Returns an embeddings model for the configured LLM_PROVIDER.
+    Used for semantic (similarity-based) caching of LLM results.
+    """
+    provider = settings.LLM_PROVIDER.lower()
+    if provider == "ollama":
+        try:
+            embeddings = OllamaEmbeddings(base_url=settings.OLLAMA_BASE_URL, model=settings.OLLAMA_EMBEDDING_MODEL_NAME)
+            logger.info(f"Initialized Ollama Embeddings: {settings.OLLAMA_EMBEDDING_MODEL_NAME} at {settings.OLLAMA_BASE_URL}")
+            return embeddings
+        except Exception as e:
+            logger.error(f"Failed to initialize Ollama Embeddings: {e}")
+            raise
+    elif provider == "huggingface":
+        if not settings.HF_API_TOKEN:
+            logger.error("HuggingFace API token (HF_API_TOKEN) not found in environment variables.")
+            raise ValueError("HuggingFace API token is required for HuggingFace embeddings.")
+        try:
+            embeddings = HuggingFaceHubEmbeddings(repo_id=settings.HF_EMBEDDING_MODEL_NAME, huggingfacehub_api_token=settings.HF_API_TOKEN)
+            logger.info(f"Initialized HuggingFace Embeddings: {settings.HF_EMBEDDING_MODEL_NAME}")
+            return embeddings
+        except Exception as e:
+            logger.error(f"Failed to initialize HuggingFace Embeddings: {e}")
+            raise
+    else:
+        logger.error(f"Unsupported LLM provider specified: {settings.LLM_PROVIDER}")
+        raise ValueError(f"Unsupported LLM provider: {settings.LLM_PROVIDER}")
+
+def _response_text(response: Any) -> str:
+    return response.content if hasattr(response, 'content') else str(response)
+
+def parse_json_response(response: Any) -> Dict[str, Any]:
+    """
+    Parses an LLM response (BaseMessage or str) into a JSON object.
+    JSON-mode responses parse directly; otherwise the object is extracted from surrounding
+    prose/code fences with clean_json_string, with an inner-quote escape as the last resort.
+    Raises ValueError if no valid JSON object can be recovered.
+    """
+    response_content = _response_text(response)
+    try:
+        parsed = orjson.loads(response_content)
+    except orjson.JSONDecodeError:
+        cleaned_json_str = clean_json_string(response_content)
+        try:
+            parsed = orjson.loads(cleaned_json_str)
+        except orjson.JSONDecodeError:
+            logger.warning(f"parse_json_response: Invalid JSON after cleaning, attempting inner quote escape. Cleaned (first 200): '{cleaned_json_str[:200]}...'")
+            parsed = orjson.loads(escape_quotes_in_json_string_values(cleaned_json_str))
+    if not isinstance(parsed, dict):
+        raise ValueError(f"Expected a JSON object from the LLM, got {type(parsed).__name__}.")
+    return parsed
+
+def stream_json_response(llm: Union[BaseLLM, BaseChatModel], prompt: Any) -> Dict[str, Any]:
+    """
+    Streams the LLM response, scanning chunks as they arrive, and stops reading as soon as the first
+    top-level JSON object is complete. Trailing prose (or the whitespace Ollama's JSON mode can emit
+    after the object) is never waited for, and a response that has not opened a JSON object within
+    LLM_STREAM_MAX_PREAMBLE_CHARS is cancelled rather than read to the end. The result is parsed with parse_json_response.
+    """
+    scanner = JsonObjectScanner()
+    parts: List[str] = []
+    received_chars = 0
+    end = None
+    stream = llm.stream(prompt)
+    try:
+        for chunk in stream:
+            text = _response_text(chunk)
+            parts.append(text)
+            received_chars += len(text)
+            end = scanner.feed(text)
+            if end is not None:
+                break
+            if scanner.start == -1 and received_chars > settings.LLM_STREAM_MAX_PREAMBLE_CHARS:
+                # Cancel early: the model is writing prose instead of the requested JSON object
+                raise ValueError(f"No JSON object started within the first {received_chars} characters of the LLM response.")
+    finally:
+        stream.close() # Closes the HTTP response if we stopped early
+    response_content = "".join(parts)
+    return parse_json_response(response_content[scanner.start:end] if end is not None else response_content)
+
+async def astream_json_response(llm: Union[BaseLLM, BaseChatModel], prompt: Any) -> Dict[str, Any]:
+    """
+    Async variant of stream_json_response.
+    """
+    scanner = JsonObjectScanner()
+    parts: List[str] = []
+    received_chars = 0
+    end = None
+    stream = llm.astream(prompt)
+    try:
+        async for chunk in stream:
+            text = _response_text(chunk)
+            parts.append(text)
+            received_chars += len(text)
+            end = scanner.feed(text)
+            if end is not None:
+                break
+            if scanner.start == -1 and received_chars > settings.LLM_STREAM_MAX_PREAMBLE_CHARS:
+                # Cancel early: the model is writing prose instead of the requested JSON object
+                raise ValueError(f"No JSON object started within the first {received_chars} characters of the LLM response.")
+    finally:
+        await stream.aclose()
+    response_content = "".join(parts)
+    return parse_json_response(response_content[scanner.start:end] if end is not None else response_content)
+
+async def astream_json_items(llm: Union[BaseLLM, BaseChatModel], prompt: Any) -> AsyncIterator[str]:
+    """
+    Streams the LLM response and yields the JSON text of each object in the array held by the top-level
+    object (e.g., each entry of {"extractions": [...]}) as soon as its closing brace arrives, so callers can
+    validate and use items while the rest is still generating. Items completed before an error or a truncated
+    response are delivered before the error propagates. Reading stops once the top-level object is closed.
+    """
+    scanner = JsonItemScanner()
+    received_chars = 0
+    stream = llm.astream(prompt)
+    try:
+        async for chunk in stream:
+            text = _response_text(chunk)
+            received_chars += len(text)
+            for item in scanner.feed(text):
+                yield item
+            if scanner.done:
+                break
+            if scanner.start == -1 and received_chars > settings.LLM_STREAM_MAX_PREAMBLE_CHARS:
+                # Cancel early: the model is writing prose instead of the requested JSON object
+                raise ValueError(f"No JSON object started within the first {received_chars} characters of the LLM response.")
+    finally:
+        await stream.aclose()
+
+def model_identity(llm: Union[BaseLLM, BaseChatModel]) -> str:
+    """
+    Identifies the model behind a client (class, model name, output format) for use in cache keys.
+    """
+    return f"{type(llm).__name__}:{getattr(llm, 'model', None) or getattr(llm, 'repo_id', '')}:{getattr(llm, 'format', None)}"
+
+def _response_cache_key(llm: Union[BaseLLM, BaseChatModel], prompt: Any) -> str:
+    return LLMResponseCache.make_key(model_identity(llm), str(prompt))
+
+def invoke_json(llm: Union[BaseLLM, BaseChatModel], prompt: Any) -> Dict[str, Any]:
+    """
+    Invokes the LLM and returns its response as a JSON object, streaming it when LLM_STREAM_JSON_RESPONSES is enabled.
+    Identical prompts are served from the response cache when it is active.
+    """
+    cache_key = _response_cache_key(llm, prompt) if response_cache is not None else None
+    if cache_key is not None:
+        cached = response_cache.get(cache_key)
+        if cached is not None:
+            return cached
+    if settings.LLM_STREAM_JSON_RESPONSES:
+        parsed = stream_json_response(llm, prompt)
+    else:
+        parsed = parse_json_response(llm.invoke(prompt))
+    if cache_key is not None:
+        response_cache.set(cache_key, parsed)
+    return parsed
+
+async def ainvoke_json(llm: Union[BaseLLM, BaseChatModel], prompt: Any) -> Dict[str, Any]:
+    """
+    Async variant of invoke_json.
+    """
+    cache_key = _response_cache_key(llm, prompt) if response_cache is not None else None
+    if cache_key is not None:
+        cached = response_cache.get(cache_key)
+        if cached is not None:
+            return cached
+    if settings.LLM_STREAM_JSON_RESPONSES:
+        parsed = await astream_json_response(llm, prompt)
+    else:
+        parsed = parse_json_response(await llm.ainvoke(prompt))
+    if cache_key is not None:
+        response_cache.set(cache_key, parsed)
+    return parsed
+
+def save_response_cache():
+    """
+    Persists the response cache (if active) and logs its hit/miss counts. Call once at the end of an agent node.
+    """
+    if response_cache is not None:
+        response_cache.save()
+
+def invoke_structured(llm: Union[BaseLLM, BaseChatModel], prompt: Any, schema: Type[ModelT]) -> ModelT:
+    """
+    Invokes the LLM and validates its JSON response against a Pydantic schema.
+    Raises ValueError (incl. pydantic ValidationError) if the response does not conform.
+    """
+    return schema.model_validate(invoke_json(llm, prompt))
+
+async def ainvoke_structured(llm: Union[BaseLLM, BaseChatModel], prompt: Any, schema: Type[ModelT]) -> ModelT:
+    """
+    Async variant of invoke_structured.
+    """
+    return schema.model_validate(await ainvoke_json(llm, prompt))
+
 # Example usage:
 if __name__ == "__main__":
     # Ensure .env is set up correctly for the desired provider
@@ -1,34 +1,87 @@
-import os
-from sendgrid import SendGridAPIClient
-from sendgrid.helpers.mail import Mail, Email
+import asyncio
+from functools import lru_cache
+from itertools import batched # Python 3.12+ (runtime.txt pins python-3.12)
+import httpx
+from sendgrid.helpers.mail import Email, Mail, Personalization, To
 from src.config import get_settings
 from src.utils import logger
-from typing import List
+from typing import List, Dict, Any, Optional, Sequence
 from datetime import datetime
 
 settings = get_settings()
 
+# SendGrid v3 REST endpoint; the payload is built with the sendgrid SDK's Mail helper and posted over httpx
+SENDGRID_API_BASE_URL = "https://api.sendgrid.com"
+SENDGRID_MAIL_SEND_PATH = "/v3/mail/send"
+SENDGRID_MAX_PERSONALIZATIONS = 1000 # API limit on personalizations (recipients here) per mail/send call
+
 class SendGridClient:
     """
     A client to send emails using SendGrid.
+    Requests go through an httpx.AsyncClient whose pooled keep-alive connections are reused across
+    sends, so the TCP/TLS handshake is paid once per pool rather than once per API call.
     """
     def __init__(self):
         if not settings.SENDGRID_API_KEY:
             logger.error("SENDGRID_API_KEY not found in environment variables. Email sending will not function.")
             raise ValueError("SENDGRID_API_KEY is required for SendGridClient.")
-        self.sg = SendGridAPIClient(settings.SENDGRID_API_KEY)
         self.sender_email = settings.NEWSLETTER_SENDER_EMAIL
+        self._from = Email(self.sender_email) # Parsed once; Mail() reuses an Email instance as-is
+        self._headers = {"Authorization": f"Bearer {settings.SENDGRID_API_KEY}"}
+        self._limits = httpx.Limits(max_connections=20, max_keepalive_connections=10, keepalive_expiry=10.0)
+        self._client: Optional[httpx.AsyncClient] = None # Created on first use, inside the running event loop
         logger.info(f"SendGridClient initialized with sender email: {self.sender_email}")
 
-    def send_email(self, recipients: List[str], subject: str, content_html: str) -> bool:
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(base_url=SENDGRID_API_BASE_URL, headers=self._headers, limits=self._limits, timeout=30.0)
+        return self._client
+
+    async def aclose(self):
+        """
+        Closes the connection pool (releases its sockets). A later send opens a new one.
+        """
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def _build_payload(self, recipients: Sequence[str], subject: str, content_html: str, content_text: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Builds one mail/send payload with a personalization per recipient, so every recipient
+        gets their own copy and never sees the rest of the list in the To: header.
+        With content_text, a text/plain part is sent alongside the HTML (multipart/alternative).
+        """
+        message = Mail(from_email=self._from, subject=subject, plain_text_content=content_text or None, html_content=content_html)
+        for recipient in recipients:
+            personalization = Personalization()
+            personalization.add_to(To(recipient))
+            message.add_personalization(personalization)
+        return message.get()
+
+    async def _post_payload(self, payload: Dict[str, Any], recipient_count: int) -> bool:
+        try:
+            response = await self._get_client().post(SENDGRID_MAIL_SEND_PATH, json=payload)
+            if response.status_code in [200, 202]:
+                logger.info(f"Email sent successfully to {recipient_count} recipients! Status Code: {response.status_code}")
+                return True
+            else:
+                logger.error(f"Failed to send email. Status Code: {response.status_code}, Body: {response.text}, Headers: {response.headers}")
+                return False
+        except Exception as e:
+            logger.error(f"Error sending email via SendGrid: {e}", exc_info=True)
+            return False
+
+    async def send_email_async(self, recipients: List[str], subject: str, content_html: str, content_text: Optional[str] = None) -> bool:
         """
         Sends an email to the specified recipients.
+        Recipients are packed SENDGRID_MAX_PERSONALIZATIONS per API call, and the calls are sent concurrently.
         Args:
             recipients (List[str]): List of recipient email addresses.
             subject (str): The subject of the email.
             content_html (str): The HTML content of the email body.
+            content_text (Optional[str]): Plain-text alternative of the body, if available.
         Returns:
-            bool: True if email was sent successfully, False otherwise.
+            bool: True if every API call succeeded, False otherwise.
         """
         if not recipients:
             logger.warning("No recipients provided for email. Skipping send.")
@@ -36,26 +89,33 @@ class SendGridClient:
 
         logger.info(f"Attempting to send email to {len(recipients)} recipients with subject: '{subject}'")
 
-        message = Mail(
-            from_email=self.sender_email,
-            to_emails=recipients,
-            subject=subject,
-            html_content=content_html
-        )
-        try:
-            response = self.sg.send(message)
-            if response.status_code in [200, 202]:
-                logger.info(f"Email sent successfully! Status Code: {response.status_code}")
-                return True
-            else:
-                logger.error(f"Failed to send email. Status Code: {response.status_code}, Body: {response.body}, Headers: {response.headers}")
-                return False
-        except Exception as e:
-            logger.error(f"Error sending email via SendGrid: {e}", exc_info=True)
-            return False
+        chunks = list(batched(recipients, SENDGRID_MAX_PERSONALIZATIONS))
+        results = await asyncio.gather(*(
+            self._post_payload(self._build_payload(chunk, subject, content_html, content_text), len(chunk)) for chunk in chunks
+        ))
+        if not all(results):
+            logger.error(f"SendGrid accepted {sum(results)} of {len(chunks)} recipient batch(es).")
+        return all(results)
 
-# Instantiate the client
-sendgrid_client_instance = SendGridClient()
+    def send_email(self, recipients: List[str], subject: str, content_html: str, content_text: Optional[str] = None) -> bool:
+        """
+        Synchronous wrapper around send_email_async: runs it on a fresh event loop and closes
+        the connection pool afterwards (the pool is bound to that loop).
+        """
+        async def _send_and_close() -> bool:
+            try:
+                return await self.send_email_async(recipients, subject, content_html, content_text)
+            finally:
+                await self.aclose()
+        return asyncio.run(_send_and_close())
+
+@lru_cache(maxsize=1)
+def get_sendgrid_client() -> SendGridClient:
+    """
+    Returns the shared SendGridClient, created on first use rather than at import, so importing
+    this module never requires SENDGRID_API_KEY (the ValueError surfaces only when sending).
+    """
+    return SendGridClient()
 
 # Example usage (for testing purposes)
 if __name__ == "__main__":
@@ -80,7 +140,7 @@ if __name__ == "__main__":
         print("No recipients configured in .env for testing (NEWSLETTER_RECIPIENTS). Please set it to your email.")
     else:
         print(f"Attempting to send test email to: {test_recipients}")
-        success = sendgrid_client_instance.send_email(test_recipients, test_subject, test_html_content)
+        success = get_sendgrid_client().send_email(test_recipients, test_subject, test_html_content)
         if success:
             print("Test email send initiated. Check your inbox.")
         else:
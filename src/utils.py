@@ -5,6 +5,7 @@ import re
 import unicodedata
 import json
 from pathlib import Path
+from typing import List, Optional
 
 
 # Define log file path relative to the project root
@@ -19,10 +20,12 @@ LOG_FILE_PATH = os.path.join(LOG_DIR, log_file_name)
 DATA_DIR = Path(os.path.dirname(os.path.abspath(__file__))) / '..' / 'data'
 PROCESSED_CONTENT_DIR = DATA_DIR / 'processed_content'
 NEWSLETTER_DRAFTS_DIR = DATA_DIR / 'newsletter_drafts'
+CACHE_DIR = DATA_DIR / 'cache'
 
 # Ensure directories exist
 PROCESSED_CONTENT_DIR.mkdir(parents=True, exist_ok=True)
 NEWSLETTER_DRAFTS_DIR.mkdir(parents=True, exist_ok=True)
+CACHE_DIR.mkdir(parents=True, exist_ok=True)
 
 
 def setup_logging():
@@ -51,27 +54,193 @@ def setup_logging():
 logger = setup_logging()
 
 
+# --- Precompiled patterns for LLM JSON cleaning (compiled once at import, reused on every call) ---
+_JSON_STRUCTURAL_CHAR_RE = re.compile(r'[{}"\\]')
+# One string-aware pass over the extracted object: double-quoted strings are consumed whole (so nothing inside them
+# is touched except raw control characters), single-quoted strings become double-quoted, Python literals become
+# JSON literals, and stray backticks and trailing commas before '}' / ']' are dropped.
+_JSON_CLEANUP_TOKEN_RE = re.compile(
+    r'(?P<dq>"(?:[^"\\]|\\.)*")'
+    r"|(?P<sq>'[^'\n]*')"
+    r'|(?P<lit>\b(?:None|True|False)\b)'
+    r'|(?P<drop>`+|,(?=\s*[}\]]))',
+    re.DOTALL
+)
+_QUOTE_OR_BACKSLASH_RE = re.compile(r'["\\]')
+_PYTHON_TO_JSON_LITERALS = {'None': 'null', 'True': 'true', 'False': 'false'}
+# Single-pass str.translate tables: drop BOM/zero-width spaces and map NBSP to a space; escape raw control characters
+_INVISIBLE_CHARS_TABLE = str.maketrans({'\ufeff': None, '\u200b': None, '\u00A0': ' '})
+_CONTROL_CHARS_ESCAPE_TABLE = str.maketrans({'\n': '\\n', '\t': '\\t', '\r': '\\r'})
+# Structural characters for JsonItemScanner (array brackets count towards nesting depth)
+_JSON_NESTING_CHAR_RE = re.compile(r'[{}\[\]"\\]')
+# What may follow a string's closing quote: a structural character/end of input, or a comma and the next key/value
+_STRING_TERMINATOR_RE = re.compile(r'\s*(?:$|[}\]:]|,\s*(?:["{\[\]}\-0-9]|true|false|null))')
+
+
+# --- Linear-time JSON object extraction ---
+class JsonObjectScanner:
+    """
+    Incremental brace-depth scanner for a JSON object that may arrive in chunks (e.g., a streamed LLM response).
+    Only structural characters are visited; braces inside string literals are skipped (honouring backslash
+    escapes), so nested objects and trailing prose are handled without regex backtracking.
+    feed() returns the offset (into all text fed so far) just past the closing brace of the first
+    top-level object once it is complete, or None while it is still open. `start` is the offset of its opening brace.
+    """
+    def __init__(self):
+        self.start = -1
+        self.end: Optional[int] = None
+        self._depth = 0
+        self._in_string = False
+        self._escaped_index = -1
+        self._offset = 0 # Characters fed before the current chunk
+
+    def feed(self, chunk: str) -> Optional[int]:
+        if self.end is not None:
+            return self.end
+        pos = 0
+        if self.start == -1:
+            pos = chunk.find('{')
+            if pos == -1:
+                self._offset += len(chunk)
+                return None
+            self.start = self._offset + pos
+
+        for match in _JSON_STRUCTURAL_CHAR_RE.finditer(chunk, pos):
+            index = self._offset + match.start()
+            if index == self._escaped_index:
+                continue
+            char = match.group()
+            if self._in_string:
+                if char == '\\':
+                    self._escaped_index = index + 1
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char == '{':
+                self._depth += 1
+            elif char == '}':
+                self._depth -= 1
+                if self._depth == 0:
+                    self.end = index + 1
+                    return self.end
+        self._offset += len(chunk)
+        return None
+
+
+class JsonItemScanner:
+    """
+    Incremental scanner that picks the items out of an array held by the top-level JSON object
+    (e.g., each entry of {"extractions": [{...}, {...}]}) while the response is still arriving.
+    feed() returns the text of every item object completed by the chunk, in order. Like JsonObjectScanner,
+    only structural characters are visited and string literals (with backslash escapes) are skipped.
+    `done` becomes True once the top-level object is closed.
+    """
+    ITEM_DEPTH = 3 # top-level '{' -> array '[' -> item '{'
+
+    def __init__(self):
+        self.start = -1
+        self.done = False
+        self._text = ""
+        self._depth = 0
+        self._in_string = False
+        self._escaped_index = -1
+        self._item_start = -1
+
+    def feed(self, chunk: str) -> List[str]:
+        items: List[str] = []
+        if self.done:
+            return items
+        pos = len(self._text)
+        self._text += chunk
+        if self.start == -1:
+            self.start = self._text.find('{', pos)
+            if self.start == -1:
+                return items
+            pos = self.start
+
+        for match in _JSON_NESTING_CHAR_RE.finditer(self._text, pos):
+            index = match.start()
+            if index == self._escaped_index:
+                continue
+            char = match.group()
+            if self._in_string:
+                if char == '\\':
+                    self._escaped_index = index + 1
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char == '{' or char == '[':
+                self._depth += 1
+                if char == '{' and self._depth == self.ITEM_DEPTH:
+                    self._item_start = index
+            else:
+                if char == '}' and self._depth == self.ITEM_DEPTH and self._item_start != -1:
+                    items.append(self._text[self._item_start:index + 1])
+                    self._item_start = -1
+                self._depth -= 1
+                if self._depth == 0:
+                    self.done = True
+                    break
+        return items
+
+
+def extract_json_object(text: str) -> Optional[str]:
+    """
+    Returns the first complete top-level JSON object in text, or None if no balanced object is found.
+    If a ``` fence is present, the search for the opening brace starts inside it.
+    """
+    fence = text.find('```')
+    start = text.find('{', fence + 3) if fence != -1 else -1
+    if start == -1:
+        start = text.find('{')
+    if start == -1:
+        return None
+    end = JsonObjectScanner().feed(text[start:])
+    return text[start:start + end] if end is not None else None
+
+
 # --- Main JSON string cleaner (focused on structural extraction and minimal fixes) ---
+def _clean_json_token(match: re.Match) -> str:
+    kind = match.lastgroup
+    token = match.group()
+    if kind == 'dq':
+        # Escape raw newlines/tabs inside the string value; backticks (markdown residue) are dropped
+        return token.replace('`', '').translate(_CONTROL_CHARS_ESCAPE_TABLE)
+    if kind == 'sq':
+        # Single-quoted strings are the most common LLM mistake; they are assumed to be meant as strings
+        return '"' + token[1:-1].replace('`', '').translate(_CONTROL_CHARS_ESCAPE_TABLE) + '"'
+    if kind == 'lit':
+        return _PYTHON_TO_JSON_LITERALS[token]
+    return ''
+
 def clean_json_string(json_str: str) -> str:
     """
-    Extracts the most probable JSON string from a given text, focusing on markdown fences
-    or outermost braces. It performs minimal, safe string cleaning for common LLM non-JSON output.
+    Extracts the most probable JSON string from a given text, using extract_json_object
+    with an outermost-braces fallback. It performs minimal, safe string cleaning for common LLM non-JSON output.
     More complex JSON syntax fixing (e.g., escaping inner quotes, fixing missing commas)
-    is handled in a retry loop in the calling agent.
+    is left to the caller (see escape_quotes_in_json_string_values).
     """
     current_str = json_str
 
     # 1. Normalize unicode whitespace and remove BOM/zero-width spaces. Aggressively strip outer whitespace.
-    current_str = unicodedata.normalize("NFKC", current_str).strip()
-    current_str = current_str.replace('\ufeff', '').replace('\u200b', '').replace('\u00A0', ' ')
+    # Pure-ASCII input (almost every LLM response) is already NFKC and has no invisible characters, so it skips both.
+    if current_str.isascii():
+        current_str = current_str.strip()
+    else:
+        if not unicodedata.is_normalized("NFKC", current_str): # Quick-check; most non-ASCII output is already NFKC
+            current_str = unicodedata.normalize("NFKC", current_str)
+        current_str = current_str.strip()
+        current_str = current_str.translate(_INVISIBLE_CHARS_TABLE)
     
-    # 2. Extract JSON from markdown code blocks first or find outermost braces.
-    match = re.search(r"```(?:json)?\s*(\{.*?\})\s*```", current_str, re.DOTALL)
-    if match:
-        extracted_json = match.group(1).strip()
-        logger.debug("clean_json_string: Extracted JSON from markdown code block.")
+    # 2. Extract the first balanced JSON object (inside a markdown code block if there is one).
+    extracted_json = extract_json_object(current_str)
+    if extracted_json is not None:
+        extracted_json = extracted_json.strip()
+        logger.debug("clean_json_string: Extracted JSON object by brace depth.")
     else:
-        # If no code block, try to find the outermost JSON object by braces.
+        # Unbalanced (e.g., truncated output or a stray unescaped quote): fall back to the outermost braces.
         start_brace = current_str.find('{')
         end_brace = current_str.rfind('}')
         if start_brace != -1 and end_brace != -1 and end_brace > start_brace:
@@ -81,19 +250,8 @@ def clean_json_string(json_str: str) -> str:
             logger.warning("clean_json_string: No discernible JSON object structure (missing outer braces or code block). Returning original string for external handling.")
             extracted_json = current_str.strip() # Return the cleaned raw string
 
-    # 3. Perform very basic, non-destructive JSON literal replacements
-    # Convert Python-style None/True/False to JSON-style null/true/false (safe)
-    extracted_json = extracted_json.replace('None', 'null').replace('True', 'true').replace('False', 'false')
-    
-    # Remove any stray backticks that might have remained from markdown cleanup
-    extracted_json = extracted_json.replace('`', '')
-
-    # Convert single-quoted strings to double-quoted strings (most common LLM mistake)
-    # This regex is broad, but essential for parsability. It assumes '...' are meant to be strings.
-    extracted_json = re.sub(r"'(.*?)'", r'"\1"', extracted_json)
-    
-    # Replace unescaped newlines/tabs within what appear to be string values.
-    extracted_json = re.sub(r'"((?:[^"\\]|\\.)*)"', lambda m: '"' + m.group(1).replace('\n', '\\n').replace('\t', '\\t').replace('\r', '\\r') + '"', extracted_json, flags=re.DOTALL)
+    # 3. Perform basic, non-destructive fixes in a single left-to-right pass (see _JSON_CLEANUP_TOKEN_RE)
+    extracted_json = _JSON_CLEANUP_TOKEN_RE.sub(_clean_json_token, extracted_json)
 
     return extracted_json.strip() # Final strip
 
@@ -101,34 +259,39 @@ def clean_json_string(json_str: str) -> str:
 # --- Helper for escaping quotes in string values (for retry logic) ---
 def escape_quotes_in_json_string_values(json_string: str) -> str:
     """
-    Attempts to escape unescaped double quotes inside string values of a JSON string.
-    This is a targeted fix for LLM output issues like 'They"re' or 'control or "brain"'.
+    Escapes stray double quotes inside JSON string values in a single left-to-right pass.
+    A '"' inside a string only closes it when followed (after whitespace) by '}', ']', ':' or the end
+    of input, or by ',' and the start of another key/value; any other inner quote, as in 'They"re'
+    or 'control or "brain" to control', is escaped. Existing backslash escapes are left untouched.
     It is designed to be applied *after* initial cleaning by clean_json_string and
     *before* a retry of json.loads().
     """
-    logger.debug(f"escape_quotes_in_json_string_values: Attempting to fix unescaped internal quotes. Original (first 200): {json_string[:200]}...")
-
-    # Regex to find quoted strings, then use a callback to fix their internal quotes.
-    # It finds a string that starts with a quote, captures its content (non-quote or escaped quote),
-    # then makes sure it ends with a quote.
-    def fix_internal_quotes_callback(match):
-        # match.group(1) is the content INSIDE the outer double quotes of the matched string.
-        content = match.group(1)
-        
-        # This is the core fix: replace any UNESCAPED double quotes within the content with `\"`
-        # We need to be careful not to double-escape. So, temporarily unescape first.
-        temp_fixed_content = content.replace(r'\"', '[TEMP_ESCAPED_QUOTE_HOLDER]') # Preserve existing escaped quotes
-        temp_fixed_content = temp_fixed_content.replace('"', r'\"') # Escape all remaining (unescaped) quotes
-        final_content = temp_fixed_content.replace('[TEMP_ESCAPED_QUOTE_HOLDER]', r'\"') # Restore original escapes
-        
-        return f'"{final_content}"'
-
-    # Apply this fix globally to all strings that match the pattern of a JSON string.
-    # This assumes the outer structure (keys, values, arrays) is mostly correct.
-    # The `json.loads` will then validate the overall structure.
-    fixed_json_string = re.sub(r'"((?:[^"\\]|\\.)*)"', fix_internal_quotes_callback, json_string, flags=re.DOTALL)
-    
-    logger.debug(f"escape_quotes_in_json_string_values: After fix (first 200): {fixed_json_string[:200]}...")
+    parts = []
+    last = 0
+    in_string = False
+    escaped_index = -1
+    for match in _QUOTE_OR_BACKSLASH_RE.finditer(json_string):
+        index = match.start()
+        if index == escaped_index:
+            continue
+        if match.group() == '\\':
+            if in_string:
+                escaped_index = index + 1
+            continue
+        if not in_string:
+            in_string = True
+        elif _STRING_TERMINATOR_RE.match(json_string, index + 1):
+            in_string = False
+        else:
+            parts.append(json_string[last:index])
+            parts.append('\\"')
+            last = index + 1
+
+    if not parts:
+        return json_string
+    parts.append(json_string[last:])
+    fixed_json_string = ''.join(parts)
+    logger.debug(f"escape_quotes_in_json_string_values: Escaped stray quotes (first 200): {fixed_json_string[:200]}...")
     return fixed_json_string
 
 
@@ -11,7 +11,7 @@ project_root = os.path.abspath(os.path.join(os.path.dirname(__file__)))
 sys.path.insert(0, project_root)
 
 # Import necessary components from your project
-from src.main import create_newsletter_workflow # The function that builds and compiles the graph
+from src.main import create_newsletter_workflow, install_event_loop_policy # Builds and compiles the graph; uvloop for the async nodes
 from src.state import AgentState # The shared state definition
 from src.models.newsletter_models import Newsletter # To display the final output
 from src.config import get_settings # Import get_settings
@@ -59,6 +59,7 @@ class StreamlitLogHandler(logging.Handler):
 def get_workflow_app():
     """Caches the LangGraph workflow compilation."""
     app_logger_instance.info("Building and compiling LangGraph workflow (inside cached function)...")
+    install_event_loop_policy() # Once per process, like the workflow itself
     app = create_newsletter_workflow()
     app_logger_instance.info("LangGraph workflow compiled successfully for Streamlit (inside cached function).")
     return app